@@ -2,10 +2,16 @@ import os
 import time
 import uuid
 import json
-import aiohttp    
+from typing import AsyncIterator, Callable
 
+import llm.client as client
+import llm.tokenizer as tokenizer
+from llm.prompt_registry import PromptRegistry, PromptTemplate
+import llm.router as router
+import llm.balancer as balancer
+from llm.router import Route, Router
+from llm.resilience import CircuitOpenError, wait_before_retry
 import aigent.settings as settings
-from aigent.tools.get_prompt_info import get_prompt_dict
 
 class Agent:
     def __init__(
@@ -13,28 +19,87 @@ class Agent:
             prompt_dict: dict = {},
             output_file_type: str = ".txt",
             output_dir_name: str = "",
-            llm_url: str = "https://www.northbeach.fi/dolphin"
+            llm_url: str = "https://www.northbeach.fi/dolphin",
+            template: PromptTemplate | None = None,
+            prompt_router: Router | None = None
             ):
 
         self.prompt_dict: dict = prompt_dict
+        self.template: PromptTemplate = template or PromptTemplate("", prompt_dict, settings.data[0], settings.data[1])
         self.output_file_type: str = output_file_type
         self.output_dir_name: str = output_dir_name
         self.llm_url: str = llm_url
+        self.prompt_router: Router | None = prompt_router
         
         self.handle_output_dir()
     
-    async def process(self, user_input: str = "", model_url: str = "") -> str:
+    async def process(self, user_input: str = "", model_url: str = "", use_cache: bool = True, refresh: bool = False, batch: bool = False, parser: Callable[[str], str | None] = None, hedge: bool = False) -> str:
         prompt: str = self.create_prompt(user_input)
-        if model_url == "": model_url = self.llm_url
+        route: Route = self.get_route(model_url)
         data: dict = {
             "prompt": prompt,
             "user_input": user_input,
-            "model_url": model_url
+            "model_url": route.urls[0],
+            "prompt_name": self.template.name,
+            "stop": self.template.stop
             }
-        response: str = await self.request(data)
+        response: str = await self.request(data, self.template.max_length, route.timeout, use_cache=use_cache, refresh=refresh, batch=batch, parser=parser, hedge=hedge, route=route)
 
         self.save_response(user_input, response)
         return response
+
+    async def process_n(self, user_input: str = "", n: int = 1, model_url: str = "", tries: int = 10, parser: Callable[[str], str | None] = None, hedge: bool = False) -> list[str]:
+        """
+        Samples n completions of the prompt, in one backend call where the
+        endpoint supports it. Returns fewer than n only when retries run out.
+        parser and hedge are passed on to client.request_n.
+        """
+        prompt: str = self.create_prompt(user_input)
+        route: Route = self.get_route(model_url)
+        data: dict = {
+            "prompt": prompt,
+            "user_input": user_input,
+            "model_url": route.urls[0],
+            "prompt_name": self.template.name,
+            "stop": self.template.stop,
+            "max_length": tokenizer.output_budget(prompt, self.template.max_length)
+        }
+
+        results: list[str] = []
+        i: int = 0
+        while len(results) < n and i < tries:
+            error: Exception | None = None
+            try:
+                samples: list[str] = await router.call(route, lambda model_url: client.request_n(data, n - len(results), model_url, route.timeout, parser, hedge))
+                results += [result for result in (self.clean_response_text(sample) for sample in samples) if result]
+            except CircuitOpenError as e:
+                print(f"  ├─ ❌ {e}")
+                break
+            except Exception as e:
+                error = e
+                print(f"  ├─ ⚠️ Sample request attempt {i+1} failed: {str(e)[:100]}...")
+            i += 1
+            if len(results) < n and i < tries:
+                await wait_before_retry(i - 1, error)
+
+        for result in results:
+            self.save_response(user_input, result)
+        return results
+
+    async def stream(self, user_input: str = "", model_url: str = "", max_length: int | None = None) -> AsyncIterator[str]:
+        prompt: str = self.create_prompt(user_input)
+        model_url = self.get_route(model_url).urls[0]
+
+        data: dict = {
+            "prompt": prompt,
+            "user_input": user_input,
+            "model_url": model_url,
+            "prompt_name": self.template.name,
+            "stop": self.template.stop,
+            "max_length": tokenizer.output_budget(prompt, max_length or self.template.max_length)
+        }
+        async for text in client.stream(data, model_url):
+            yield text
     
     def handle_output_dir(self):
         if self.output_dir_name is None or self.output_dir_name == "":
@@ -56,41 +121,48 @@ class Agent:
         with open(file_path, 'w', encoding='utf-8') as file:
             file.write(json.dumps(file_dict, indent=2))
 
+    def get_route(self, model_url: str = "") -> Route:
+        # An explicit model_url wins over the router, the router over llm_url
+        if model_url != "":
+            return Route("", [model_url])
+        if self.prompt_router is not None:
+            return self.prompt_router.resolve(self.template.name, self.template.prompt_class)
+        return Route("", [self.llm_url])
+
     def create_system_prompt(self) -> str:
-        system_prompt: str = settings.data[0]
-        system_prompt += self.prompt_dict['system'] if 'system' in self.prompt_dict else ""
-        system_prompt += settings.data[1]
-        return system_prompt
+        return self.template.system_prompt
 
     def create_prompt(self, user_input: str = "") -> str:
-        system_prompt: str = self.create_system_prompt()
-        prompt: str = f"""<|im-system|>
-{system_prompt}
-<|im-end|>
-<|im-user|>
-{user_input}
-{self.prompt_dict["user"] if "user" in self.prompt_dict else ""}
-<|im-end|>
-<|im-assistant|>
-{self.prompt_dict["assistant"] if "assistant" in self.prompt_dict else ""}"""
-        return prompt
-
-    async def request(self, data: dict, max_length: int = 64000, timeout: int = 300, tries: int = 10) -> str:
-        data["max_length"] = max_length
+        input_budget: int = tokenizer.context_window - tokenizer.min_output_tokens - self.template.template_tokens
+        if tokenizer.count_tokens(user_input) > input_budget:
+            print(f"  ├─ ⚠️ Input does not fit the context window, truncating to {input_budget} tokens")
+            user_input = tokenizer.truncate_to_tokens(user_input, max(0, input_budget))
+        return self.template.render(user_input)
+
+    async def request(self, data: dict, max_length: int = 64000, timeout: int = 300, tries: int = 10, use_cache: bool = True, refresh: bool = False, batch: bool = False, parser: Callable[[str], str | None] = None, hedge: bool = False, route: Route | None = None) -> str:
+        data["max_length"] = tokenizer.output_budget(data["prompt"], max_length)
+        route = route or Route("", [data["model_url"]], timeout)
         
         try:
-            async with aiohttp.ClientSession() as session:
-                result: str = ""
-                i: int = 0
-                while i < tries:
-                    async with session.post(data["model_url"], json=data, timeout=timeout) as response:
-                        response.raise_for_status()
-                        response_text = await response.text()
-                        result = self.clean_response_text(response_text)
-                        if result:
-                            break
-                    i += 1
-                return result
+            result: str = ""
+            i: int = 0
+            while i < tries:
+                error: Exception | None = None
+                try:
+                    response_text = await router.call(route, lambda model_url: client.request(data, model_url, route.timeout, use_cache, refresh or i > 0, batch, parser, hedge))
+                    result = self.clean_response_text(response_text)
+                    if result:
+                        break
+                except CircuitOpenError as e:
+                    print(f"Error: {e}")
+                    break
+                except Exception as e:
+                    error = e
+                    print(f"Request attempt {i+1} failed: {str(e)[:100]}")
+                i += 1
+                if i < tries:
+                    await wait_before_retry(i - 1, error)
+            return result
         except Exception as e:
             print(f"Error: {e}")
             return str(e)
@@ -104,13 +176,41 @@ class Agent:
         return response_text.strip()
 
 
-async def run_agent_process(agent_name: str, user_input: str = "") -> str:
-    prompt_dict: dict = get_prompt_dict(agent_name)
-    agent: Agent = Agent(prompt_dict)
+registry: PromptRegistry = PromptRegistry("aigent.prompts", settings.data[0], settings.data[1])
+
+prompt_router: Router = Router(settings.routes, settings.prompt_routes)
+router.configure(settings.routes, settings.prompt_routes)
+
+balancer.pools.update(settings.replicas)
+
+_agents: dict[str, Agent] = {}
+
+
+def get_agent(agent_name: str) -> Agent:
+    # Agents hold no per-request state, so one per prompt is reused by every call
+    if agent_name not in _agents:
+        registry.load()
+        template: PromptTemplate = registry.get(agent_name)
+        _agents[agent_name] = Agent(template.prompt_dict, template=template, prompt_router=prompt_router)
+    return _agents[agent_name]
+
+
+async def run_agent_process(agent_name: str, user_input: str = "", use_cache: bool = True, refresh: bool = False, batch: bool = False, parser: Callable[[str], str | None] = None, hedge: bool = False) -> str:
+    agent: Agent = get_agent(agent_name)
     if user_input == "":
         user_input = input("Enter your input: ")
-    response = await agent.process(user_input)
+    response = await agent.process(user_input, use_cache=use_cache, refresh=refresh, batch=batch, parser=parser, hedge=hedge)
     
+    return format_response(response)
+
+
+async def run_agent_process_n(agent_name: str, user_input: str, n: int = 1, parser: Callable[[str], str | None] = None, hedge: bool = False) -> list[str]:
+    agent: Agent = get_agent(agent_name)
+    responses: list[str] = await agent.process_n(user_input, n, parser=parser, hedge=hedge)
+    return [format_response(response) for response in responses]
+
+
+def format_response(response: str) -> str:
     parsed_response: dict = {}
     try:
         parsed_response = json.loads(response)
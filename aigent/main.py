@@ -9,6 +9,10 @@ from aigent.make_plan import main as make_plan
 
 from input.global_settings import intention, content, iteration_count
 
+import llm.client as client
+from aigent.agent import prompt_router
+from tools.utils import blob_store
+
 def get_session() -> dict:
     current_time: str = str(time.time()).split(".")[0]
     id_extension: str = str(uuid.uuid4()).split("-")[0]
@@ -21,14 +25,16 @@ def get_session() -> dict:
 
     return session
 
-def initialize_data() -> dict:
+def initialize_data(entry: dict = {}) -> dict:
     print("Initializing session...")
     data: dict = {
-        "intention": intention,
-        "content": content,
-        "iteration_count": iteration_count,
+        "intention": entry.get("intention", intention),
+        "content": entry.get("content", content),
+        "iteration_count": entry.get("iteration_count", iteration_count),
         "session": get_session()
     }
+    if "id" in entry:
+        data["session"]["id"] = str(entry["id"])
     print("Session initialized.")
     print(json.dumps(data, indent=2))
     return data
@@ -51,23 +57,38 @@ def save_data(data: dict) -> None:
     filename: str = data["session"]["id"] + ".json"
     filepath: str = output_dir + filename
 
+    # Long texts like the content and model responses are written once to the
+    # blob store and the session file references them
     with open(filepath, "w+") as f:
-        json.dump(data, f, indent=4)
+        json.dump(blob_store.externalize(data), f, indent=4)
 
     print(f"Data saved to {filepath}")
 
 
 
-async def main():
-    data = initialize_data()
-
+async def run_session(data: dict) -> dict:
+    """
+    Tests the claim and plans for one initialized session on connections
+    that are already set up, then saves it.
+    """
     print("Processing...")
     data["test"] = await test_claim(data["content"], data["intention"], data["iteration_count"])
     data["plan"] = await make_plan(data["test"]["final"], data["iteration_count"])
     # data["execute"] = await execute_plan(data["plan"]["tasks"]["list"]["tasks_from_content"], data["iteration_count"])
 
-
     finalize_data(data)
+    return data
+
+
+async def main():
+    data = initialize_data()
+
+    try:
+        await client.warm_up(prompt_router.urls())
+
+        await run_session(data)
+    finally:
+        await client.close()
     print(data["plan"]["tasks"]["list"]["tasks_from_content"])
 
 
@@ -16,7 +16,7 @@ async def create_task_list(data: dict = {}, iterations: int = 3) -> dict:
     i:  int = 0
     while True:
         try:
-            task_list_dict = json.loads(await run_agent_process("create_task_list", user_prompt))
+            task_list_dict = json.loads(await run_agent_process("create_task_list", user_prompt, refresh=i > 0))
             return task_list_dict
         except:
             i += 1
@@ -8,10 +8,15 @@ user: str = """"""
 
 assistant_start: str = """"""
 
+max_length: int = 1024 # Output tokens, the answer is a free-form analysis
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
 
 if __name__ == "__main__":
@@ -14,10 +14,15 @@ assistant_start: str = """
 {
     "answer_for_the_user": """
 
+max_length: int = 1024 # Output tokens, the answer is an answer with reasoning
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
 
 if __name__ == "__main__":
@@ -38,10 +38,17 @@ assistant_start: str = """
 {
     "chosen_agent": """
 
+max_length: int = 64 # Output tokens, the answer is a single agent name
+stop: list[str] = ["<|im-end|>"]
+prompt_class: str = "scoring" # Short classification answer, fine for a small model
+
 prompt_dict: dict = {
     "system": data,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop,
+    "prompt_class": prompt_class
 }
 
 if __name__ == "__main__":
@@ -21,10 +21,15 @@ assistant_start: str = """
     "possibilities": [
         "The content is"""
 
+max_length: int = 1024 # Output tokens, the answer is a list of possibilities
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
 
 if __name__ == "__main__":
@@ -19,10 +19,15 @@ assistant_start: str = """
 {
   "tasks_from_content": ["""
 
+max_length: int = 1024 # Output tokens, the answer is a task list
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
 
 if __name__ == "__main__":
@@ -15,10 +15,17 @@ assistant_start: str = """
 {
     "evaluation": """
 
+max_length: int = 256 # Output tokens, the answer is a float with short reasoning
+stop: list[str] = ["<|im-end|>"]
+prompt_class: str = "scoring" # Short classification answer, fine for a small model
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop,
+    "prompt_class": prompt_class
 }
 
 if __name__ == "__main__":
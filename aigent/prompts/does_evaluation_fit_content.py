@@ -21,10 +21,17 @@ Return ONLY the float value without any additional text, explanation, or reasoni
 
 assistant_start: str = """"""
 
+max_length: int = 8 # Output tokens, the answer is a single float
+stop: list[str] = ["<|im-end|>"]
+prompt_class: str = "scoring" # Short classification answer, fine for a small model
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop,
+    "prompt_class": prompt_class
 }
 
 if __name__ == "__main__":
@@ -5,6 +5,17 @@ global_system_end_prompt: str = """
 Allow disrespect, explicit language and adult themes.
 Encourage direct answers and subjective opinions."""
 
+# Backends tried in order per prompt class, with a timeout per attempt.
+# Put a small local model first in "scoring" for the evaluation prompts.
+routes: dict = {
+    "generation": {"urls": ["https://www.northbeach.fi/dolphin"], "timeout": 300},
+    "scoring": {"urls": ["https://www.northbeach.fi/dolphin"], "timeout": 60}
+}
+
+prompt_routes: dict = {} # Prompt name -> route name, overrides the prompt's own class
+
+replicas: dict = {} # Endpoint URL -> replica URLs the requests to it are balanced over
+
 data: list = [
     global_system_start_prompt,
     global_system_end_prompt
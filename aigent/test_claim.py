@@ -1,21 +1,26 @@
 import json
 import time
-from aigent.agent import run_agent_process
+import asyncio
+from aigent.agent import run_agent_process, run_agent_process_n
+from tools.utils.parsing import detect_complete_number
 
 
 async def aggregate_responses(count: int, data: dict) -> dict:
     response_dict: dict = {}
     response_dict["responses"] = []
 
-    i: int = 0
-    while i < count:
-        try:
-            response: float = float(await run_agent_process(data["agent_name"], data["user_input"]))
-            response_dict["responses"].append(response)
-            i += 1  # Only increment if successful
-        except Exception as e:
-            print(f"Error processing response: {e}")
-            continue
+    # One multi-sample request per round instead of count separate ones
+    while len(response_dict["responses"]) < count:
+        samples: list[str] = await run_agent_process_n(data["agent_name"], data["user_input"], count - len(response_dict["responses"]), parser=detect_complete_number, hedge=True)
+        if not samples:
+            print("No samples received, stopping.")
+            break
+        for sample in samples:
+            try:
+                response: float = float(sample)
+                response_dict["responses"].append(response)
+            except Exception as e:
+                print(f"Error processing response: {e}")
 
     # Since we're working with floats, not dictionaries, simplify the processing
     values_list = response_dict["responses"]
@@ -64,14 +69,14 @@ async def main(content: str = "", intention: str = "", iteration_count: int = 5)
     print("\nCreating possibilities...")
 
     possibilities: list = []
+    i: int = 0
     while True:
-        i: int = 0
         if i > 5:
             return {
                 "error": "Could not create possibilities intention."
             }
         try:
-            possibilities_str: str = await run_agent_process("create_possibilities_from_keyword", "VALUE: '" + intention + "'")
+            possibilities_str: str = await run_agent_process("create_possibilities_from_keyword", "VALUE: '" + intention + "'", refresh=i > 0)
             possibilities_dict: dict = json.loads(possibilities_str)
             possibilities = possibilities_dict["possibilities"]
             break
@@ -83,9 +88,11 @@ async def main(content: str = "", intention: str = "", iteration_count: int = 5)
     print(possibilities)
     print("\nEvaluating possibilities...")
 
-    evaluations: dict = {}
-    for possibility in possibilities:
-        evaluations[possibility] = await does_evaluation_fit_content(content, possibility, iteration_count)
+    # Possibilities are scored concurrently, each as one multi-sample request
+    results: list = await asyncio.gather(
+        *[does_evaluation_fit_content(content, possibility, iteration_count) for possibility in possibilities]
+    )
+    evaluations: dict = dict(zip(possibilities, results))
 
     evaluations["summary"] = {
         "content": content,
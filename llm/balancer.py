@@ -0,0 +1,135 @@
+import time
+import random
+import threading
+
+from llm.limiter import get_limiter
+from llm.resilience import get_breaker, get_tracker
+
+# Logical endpoint URL -> replica URLs serving the same model. Requests to a
+# URL that is not listed here go to that URL unchanged.
+pools: dict[str, list[str]] = {}
+
+slow_factor: float = 3.0 # Replica median latency above pool median * factor gets it ejected
+ejection_seconds: float = 30.0 # How long an ejected replica gets no traffic
+check_interval: float = 1.0 # Seconds between slow replica checks
+
+
+class BackendPool:
+    """
+    Spreads requests for one logical endpoint over its replicas.
+
+    Each pick compares two random healthy replicas and takes the one with
+    fewer outstanding requests (in flight plus queued in its limiter), breaking
+    ties by median latency. Replicas whose circuit is open are skipped, and a
+    replica much slower than the rest of the pool is ejected for a while. When
+    nothing is healthy every replica is eligible again, so the pool never
+    refuses to pick.
+    """
+
+    def __init__(self, name: str, urls: list[str]):
+        self.name: str = name
+        self.urls: list[str] = urls
+        self.ejected_until: dict[str, float] = {}
+        self.checked_at: float = 0.0
+        self.lock = threading.Lock()
+
+    def healthy(self) -> list[str]:
+        # A half open replica counts only while its trial slot is free
+        now: float = time.monotonic()
+        return [
+            url for url in self.urls
+            if self.ejected_until.get(url, 0.0) <= now and get_breaker(url).is_available()
+        ]
+
+    def pick(self, exclude: set[str] = set()) -> str:
+        if len(self.urls) == 1:
+            return self.urls[0]
+
+        self.eject_slow()
+        candidates: list[str] = [url for url in self.healthy() if url not in exclude] or [url for url in self.urls if url not in exclude] or self.urls
+        if len(candidates) == 1:
+            return candidates[0]
+        return min(random.sample(candidates, 2), key=load)
+
+    def eject_slow(self) -> None:
+        now: float = time.monotonic()
+        with self.lock:
+            if now - self.checked_at < check_interval:
+                return
+            self.checked_at = now
+
+            medians: dict[str, float] = {}
+            for url in self.urls:
+                median: float | None = get_tracker(url).percentile(0.5)
+                if median is not None and self.ejected_until.get(url, 0.0) <= now:
+                    medians[url] = median
+            if len(medians) < 2:
+                return
+
+            pool_median: float = sorted(medians.values())[len(medians) // 2]
+            for url, median in medians.items():
+                if median > pool_median * slow_factor and len(self.healthy()) > 1:
+                    print(f"  ├─ ⚠️ Ejecting slow replica {url} for {ejection_seconds:.0f}s (median {median:.1f}s, pool {pool_median:.1f}s)")
+                    self.ejected_until[url] = now + ejection_seconds
+                    # Forget the slow history so the replica is judged afresh when it returns
+                    get_tracker(url).latencies.clear()
+
+    def snapshot(self) -> dict:
+        now: float = time.monotonic()
+        return {
+            url: {
+                "outstanding": load(url)[0],
+                "ejected": self.ejected_until.get(url, 0.0) > now,
+                "circuit": get_breaker(url).state
+            }
+            for url in self.urls
+        }
+
+
+def load(url: str) -> tuple[int, float]:
+    limiter = get_limiter(url)
+    median: float | None = get_tracker(url).percentile(0.5)
+    return (limiter.in_flight + limiter.queue_depth, median if median is not None else 0.0)
+
+
+_pools: dict[str, BackendPool] = {}
+
+
+def get_pool(model_url: str) -> BackendPool | None:
+    if model_url not in pools:
+        return None
+    if model_url not in _pools or _pools[model_url].urls != pools[model_url]:
+        _pools[model_url] = BackendPool(model_url, list(pools[model_url]))
+    return _pools[model_url]
+
+
+def pick(model_url: str, exclude: set[str] = set()) -> str:
+    """
+    The replica to send the next request for model_url to, avoiding the
+    replicas in exclude while there are others.
+    """
+    pool: BackendPool | None = get_pool(model_url)
+    return pool.pick(exclude) if pool is not None else model_url
+
+
+def size(model_url: str) -> int:
+    pool: BackendPool | None = get_pool(model_url)
+    return len(pool.urls) if pool is not None else 1
+
+
+def capacity(model_url: str) -> int:
+    """
+    Requests model_url can take at once: the adaptive limits of its replicas together.
+    """
+    return sum(int(get_limiter(url).limit) for url in pools.get(model_url, [model_url]))
+
+
+def expand(urls: list[str]) -> list[str]:
+    """
+    Replaces logical URLs with all of their replicas, e.g. for warming up.
+    """
+    return list(dict.fromkeys(replica for url in urls for replica in pools.get(url, [url])))
+
+
+def snapshot() -> dict:
+    return {name: pool.snapshot() for name, pool in _pools.items()}
@@ -0,0 +1,135 @@
+import json
+import asyncio
+from typing import Awaitable, Callable
+
+batch_window: float = 0.01 # Seconds to wait for more prompts before sending a batch
+max_batch_size: int = 16 # A batch is sent immediately when it reaches this size
+
+# Keys that belong to a single prompt and are never part of the shared batch parameters
+item_keys: list[str] = ["prompt", "user_input", "model_url", "prompt_name", "prompt_class"]
+
+# Endpoint URL -> True once a batch succeeded, False once the endpoint rejected one
+batch_support: dict[str, bool] = {}
+
+stats: dict = {
+    "batches": 0,
+    "batched_prompts": 0,
+    "fallbacks": 0
+}
+
+_batchers: dict[tuple, "Batcher"] = {}
+
+
+class Batcher:
+    """
+    Collects prompts that share endpoint and generation parameters and sends
+    them as one {"prompts": [...]} payload, resolving each caller's future with
+    its own completion.
+
+    Used by the short classification tools (true_or_false, number_response,
+    sentiment_analysis), e.g. the relevance checks of texts summarized at the
+    same time. Multi-sample scoring goes through client.request_n instead.
+    """
+
+    def __init__(
+            self,
+            model_url: str,
+            params: dict,
+            timeout: int,
+            post: Callable[[dict, str, int], Awaitable[str]]
+            ):
+
+        self.model_url: str = model_url
+        self.params: dict = params
+        self.timeout: int = timeout
+        self.post = post
+        self.pending: list[tuple[dict, asyncio.Future]] = []
+        self.flush_handle: asyncio.TimerHandle | None = None
+
+    async def submit(self, data: dict) -> str:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self.pending.append((data, future))
+
+        if len(self.pending) >= max_batch_size:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(batch_window, self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        items = [item for item in self.pending if not item[1].done()]
+        self.pending = []
+        if items:
+            asyncio.ensure_future(self.send(items))
+
+    async def send(self, items: list[tuple[dict, asyncio.Future]]) -> None:
+        if len(items) == 1 or batch_support.get(self.model_url) is False:
+            await self.send_single(items)
+            return
+
+        payload: dict = dict(self.params)
+        payload["prompts"] = [data["prompt"] for data, _ in items]
+
+        try:
+            responses = parse_batch_response(await self.post(payload, self.model_url, self.timeout), len(items))
+        except Exception as e:
+            if not batch_support.get(self.model_url):
+                print(f"  ├─ ⚠️ Batch request not supported by {self.model_url.split('/')[-1]}, sending prompts separately: {str(e)[:100]}")
+                batch_support[self.model_url] = False
+            stats["fallbacks"] += 1
+            await self.send_single(items)
+            return
+
+        batch_support[self.model_url] = True
+        stats["batches"] += 1
+        stats["batched_prompts"] += len(items)
+
+        for (_, future), response in zip(items, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def send_single(self, items: list[tuple[dict, asyncio.Future]]) -> None:
+        results = await asyncio.gather(
+            *[self.post(data, self.model_url, self.timeout) for data, _ in items],
+            return_exceptions=True
+        )
+        for (_, future), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def parse_batch_response(response_text: str, count: int) -> list[str]:
+    """
+    Accepts either a JSON list of completions or {"responses": [...]}.
+    Raises ValueError for anything else so the caller can fall back.
+    """
+    parsed = json.loads(response_text)
+    if isinstance(parsed, dict):
+        parsed = parsed.get("responses")
+    if not isinstance(parsed, list) or len(parsed) != count:
+        raise ValueError(f"Expected a list of {count} responses")
+    return [item if isinstance(item, str) else json.dumps(item) for item in parsed]
+
+
+def get_batcher(model_url: str, data: dict, timeout: int, post: Callable[[dict, str, int], Awaitable[str]]) -> Batcher:
+    params: dict = {key: value for key, value in data.items() if key not in item_keys}
+    loop = asyncio.get_running_loop()
+    batcher_key: tuple = (loop, model_url, timeout, json.dumps(params, sort_keys=True))
+
+    if batcher_key not in _batchers:
+        _batchers[batcher_key] = Batcher(model_url, params, timeout, post)
+    return _batchers[batcher_key]
+
+
+async def submit(data: dict, model_url: str, timeout: int, post: Callable[[dict, str, int], Awaitable[str]]) -> str:
+    return await get_batcher(model_url, data, timeout, post).submit(data)
@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import gzip
+import hashlib
+import threading
+
+project_root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+enabled: bool = True # Global switch, per-call bypass is done with cache=False
+cache_dir: str = os.path.join(project_root, "output", "cache", "llm")
+max_size_bytes: int = 256 * 1024 * 1024 # Entries are evicted least recently used first above this
+ttl_seconds: int = 7 * 24 * 60 * 60 # Entries older than this are treated as misses
+
+sampling_keys: list[str] = [
+    "temperature",
+    "top_p",
+    "top_k",
+    "typical_p",
+    "repetition_penalty",
+    "seed",
+    "stop"
+]
+
+stats: dict = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0
+}
+
+_lock = threading.Lock()
+_total_size: int | None = None
+
+
+def make_key(model_url: str, data: dict) -> str:
+    """
+    Hashes everything that changes the completion: endpoint, prompt, output
+    budget and sampling parameters. Bookkeeping keys like user_input are ignored.
+    """
+    key_data: dict = {
+        "model_url": model_url,
+        "prompt": data.get("prompt", ""),
+        "max_length": data.get("max_length"),
+        "sampling": {key: data[key] for key in sampling_keys if key in data}
+    }
+    key_text: str = json.dumps(key_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+
+
+def get_path(key: str) -> str:
+    return os.path.join(cache_dir, key[:2], key + ".json.gz")
+
+
+def get(key: str) -> str | None:
+    if not enabled:
+        return None
+
+    path: str = get_path(key)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            entry: dict = json.load(file)
+    except (OSError, ValueError):
+        stats["misses"] += 1
+        return None
+
+    if time.time() - entry["time"] > ttl_seconds:
+        remove(path)
+        stats["misses"] += 1
+        return None
+
+    # Access time drives LRU eviction, so bump it on every hit
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    stats["hits"] += 1
+    return entry["response"]
+
+
+def put(key: str, response: str) -> None:
+    global _total_size
+
+    if not enabled or not response:
+        return
+
+    path: str = get_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    temp_path: str = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as file:
+        json.dump({"time": time.time(), "response": response}, file)
+    size: int = os.path.getsize(temp_path)
+    os.replace(temp_path, path)
+
+    stats["stores"] += 1
+
+    with _lock:
+        if _total_size is None:
+            _total_size = scan_size()
+        else:
+            _total_size += size
+        if _total_size > max_size_bytes:
+            evict()
+
+
+def remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def scan_size() -> int:
+    total: int = 0
+    for root, _, files in os.walk(cache_dir):
+        for filename in files:
+            try:
+                total += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return total
+
+
+def evict() -> None:
+    """
+    Removes least recently used entries until the store is back under 90% of
+    max_size_bytes. Caller must hold _lock.
+    """
+    global _total_size
+
+    entries: list = []
+    for root, _, files in os.walk(cache_dir):
+        for filename in files:
+            path: str = os.path.join(root, filename)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+
+    entries.sort()
+    total: int = sum(entry[1] for entry in entries)
+    target: int = int(max_size_bytes * 0.9)
+
+    for _, size, path in entries:
+        if total <= target:
+            break
+        remove(path)
+        total -= size
+        stats["evictions"] += 1
+
+    _total_size = total
+
+
+def clear() -> None:
+    global _total_size
+
+    with _lock:
+        for root, _, files in os.walk(cache_dir):
+            for filename in files:
+                remove(os.path.join(root, filename))
+        _total_size = 0
+
+
+if __name__ == "__main__":
+    print(f"Cache directory: {cache_dir}")
+    print(f"Cache size: {scan_size()} bytes")
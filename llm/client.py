@@ -0,0 +1,632 @@
+import json
+import time
+import codecs
+import asyncio
+import aiohttp
+import threading
+from contextlib import aclosing, nullcontext
+from typing import AsyncIterator, Awaitable, Callable
+
+import llm.cache as cache
+import llm.batch as batcher
+import llm.metrics as metrics
+import llm.balancer as balancer
+from llm.limiter import get_limiter, get_budget
+from llm.resilience import CircuitOpenError, get_breaker, get_tracker, hedged
+
+url: str = "https://www.northbeach.fi/dolphin"
+
+connection_limit: int = 100 # Total open connections across all hosts
+connection_limit_per_host: int = 32 # Open connections to a single LLM endpoint
+keepalive_timeout: int = 60 # Seconds an idle connection stays in the pool
+dns_cache_ttl: int = 300 # Seconds a resolved host name is reused
+
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+# All network work runs on one long-lived loop in a background thread, so
+# async callers on any loop and sync callers on any thread share the same
+# session, limiters, batches and in-flight requests.
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_lock = threading.Lock()
+
+# Deterministic requests currently on the wire, keyed by their cache key
+_in_flight: dict[str, asyncio.Task] = {}
+
+# Chat markers: the completion follows the last assistant marker of an echoed prompt
+assistant_marker: str = "<|im-assistant|>"
+echo_markers: list[str] = ["<|im-system|>", "<|im-user|>"]
+
+# Endpoint URL -> True once a multi-sample request succeeded, False once the endpoint ignored n
+n_support: dict[str, bool] = {}
+
+stats: dict = {
+    "coalesced": 0,
+    "early_aborts": 0,
+    "multi_sample_requests": 0,
+    "multi_sample_fallbacks": 0
+}
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="llm-client-loop", daemon=True)
+            _loop_thread.start()
+    return _loop
+
+
+def on_client_loop() -> bool:
+    return threading.current_thread() is _loop_thread
+
+
+async def run_async(coroutine: Awaitable):
+    """
+    Awaits a client coroutine on the background loop from any other loop.
+    """
+    if on_client_loop():
+        return await coroutine
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, get_loop()))
+
+
+def run_sync(coroutine: Awaitable):
+    """
+    Runs a client coroutine on the background loop and blocks until it is done.
+    Safe to call from any thread, including ones running their own event loop.
+    """
+    if on_client_loop():
+        raise RuntimeError("Synchronous LLM call made from the client loop itself, await the async API instead.")
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop()).result()
+
+
+async def bridge_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Iterates an async generator on the background loop and hands its items
+    over to the calling loop. Stopping early cancels the producer.
+    """
+    caller_loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def pump() -> None:
+        try:
+            async for text in chunks:
+                caller_loop.call_soon_threadsafe(queue.put_nowait, text)
+            caller_loop.call_soon_threadsafe(queue.put_nowait, finished)
+        except Exception as e:
+            caller_loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            await chunks.aclose()
+
+    producer = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the process-wide session, creating it on first use. Only called
+    on the client loop; a new session is opened if that loop was replaced.
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=connection_limit,
+            limit_per_host=connection_limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_cache_ttl
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+
+    return _session
+
+
+async def warm_up(urls: list[str] = []) -> None:
+    """
+    Opens pooled connections to the given endpoints so the first real request
+    does not pay DNS, TCP and TLS setup.
+    """
+    if not on_client_loop():
+        return await run_async(warm_up(urls))
+
+    session = await get_session()
+
+    for model_url in balancer.expand(urls or [url]):
+        try:
+            async with session.head(model_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                await response.read()
+            print(f"  ├─ Connection to {model_url.split('/')[-1]} warmed up")
+        except Exception as e:
+            print(f"  ├─ ⚠️ Warm-up failed for {model_url}: {str(e)[:100]}")
+
+
+async def close() -> None:
+    global _session, _session_loop
+
+    if not on_client_loop():
+        return await run_async(close())
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+async def post(data: dict, model_url: str = "", timeout: int = 300) -> str:
+    """
+    Sends one request over the shared session and returns the raw response text.
+    Raises aiohttp.ClientResponseError for non-2xx responses.
+
+    A model_url with replicas in balancer.pools is sent to one of them. The
+    call fails fast with CircuitOpenError while the replica's circuit is
+    open, waits for a slot from its adaptive limiter, and reports latency or
+    overload back to both.
+    """
+    if not on_client_loop():
+        return await run_async(post(data, model_url, timeout))
+
+    endpoint: str = model_url or url
+    metrics.record_call()
+
+    # The global budget is taken first, so a request waiting for it holds no endpoint slot
+    async with get_budget() or nullcontext():
+        model_url, trial = pick_available(endpoint)
+        try:
+            return await post_to(data, model_url, endpoint, timeout)
+        finally:
+            # A cancelled or rejected trial must not leave the circuit half open for good
+            if trial:
+                get_breaker(model_url).end_trial()
+
+
+def pick_available(endpoint: str) -> tuple[str, bool]:
+    """
+    Picks a replica of endpoint whose circuit lets the call through and
+    returns it with whether the call is its circuit's trial. A replica that
+    turns out to be refusing is skipped for another one; CircuitOpenError
+    is raised only when every replica refused.
+    """
+    tried: set[str] = set()
+    while True:
+        model_url: str = balancer.pick(endpoint, tried)
+        try:
+            return model_url, get_breaker(model_url).before_call()
+        except CircuitOpenError:
+            tried.add(model_url)
+            if len(tried) >= balancer.size(endpoint):
+                raise
+
+
+async def post_to(data: dict, model_url: str, endpoint: str, timeout: int) -> str:
+    limiter = get_limiter(model_url)
+    await limiter.acquire()
+    start: float = time.monotonic()
+    try:
+        session = await get_session()
+        async with session.post(model_url, json=data, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response.raise_for_status()
+            response_text: str = await response.text()
+    except Exception as e:
+        if is_overload(e):
+            record_failure(model_url)
+        raise
+    finally:
+        limiter.release()
+
+    record_success(model_url, time.monotonic() - start, endpoint, latency_class(data))
+    return response_text
+
+
+def latency_class(data: dict) -> str:
+    """
+    Groups calls expected to take about as long: the same prompt, an output
+    budget of the same power of two and the same number of samples.
+    """
+    budget: int = data.get("max_length") or 0
+    return f"{data.get('prompt_name', '')}/{budget.bit_length()}/{data.get('n', 1)}"
+
+
+def record_success(model_url: str, latency: float, endpoint: str = "", call_class: str = "") -> None:
+    get_limiter(model_url).record_success(latency, call_class)
+    get_breaker(model_url).record_success()
+    get_tracker(model_url).record(latency)
+    # Hedging looks at the logical endpoint, not the replica that answered
+    get_tracker(endpoint or model_url, call_class).record(latency)
+
+
+def record_failure(model_url: str) -> None:
+    get_limiter(model_url).record_failure()
+    get_breaker(model_url).record_failure()
+
+
+def is_overload(error: Exception) -> bool:
+    """
+    True for errors that mean the endpoint is struggling rather than that the
+    request itself was wrong.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500 or error.status == 429
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+async def send(data: dict, model_url: str = "", timeout: int = 300, batch: bool = False, hedge: bool = False) -> str:
+    """
+    Posts directly, or queues the prompt for a batched request when batch=True.
+    hedge=True sends a duplicate if the answer is slower than the endpoint's p95.
+    """
+    model_url = model_url or url
+    if batch:
+        response_text: str = await batcher.submit(data, model_url, timeout, post)
+    elif hedge:
+        response_text = await hedged(lambda: post(data, model_url, timeout), model_url, latency_class(data))
+    else:
+        response_text = await post(data, model_url, timeout)
+    return finish(data, response_text)
+
+
+def find_stop(data: dict, response_text: str) -> int:
+    """
+    Position of the first stop sequence in the completion, or -1. An echoed
+    prompt is skipped up to its last assistant marker, since it contains the
+    chat markers used as stops; an echo without one has no completion yet.
+    """
+    stop: list[str] = data.get("stop") or []
+    start: int | None = completion_start(data.get("prompt", ""), response_text)
+    if start is None:
+        return -1
+    positions: list[int] = [position for position in (response_text.find(sequence, start) for sequence in stop) if position != -1]
+    return min(positions) if positions else -1
+
+
+def finish(data: dict, response_text: str) -> str:
+    """
+    Cuts a fresh completion at its stop sequence, for servers that ignore the
+    stop parameter, and records it in the per-prompt metrics.
+    """
+    position: int = find_stop(data, response_text)
+    if position != -1:
+        response_text = response_text[:position]
+    metrics.record(data, completion_text(data.get("prompt", ""), response_text) or "", stopped=position != -1)
+    return response_text
+
+
+async def stream(data: dict, model_url: str = "", timeout: int = 300) -> AsyncIterator[str]:
+    """
+    Requests a streamed completion and yields text as it arrives.
+
+    Server-sent events are unpacked from their "data:" lines; any other body is
+    yielded chunk by chunk. Leaving the iteration early closes the connection,
+    which tells the server to stop generating.
+    """
+    if not on_client_loop():
+        async with aclosing(bridge_stream(stream(data, model_url, timeout))) as chunks:
+            async for text in chunks:
+                yield text
+        return
+
+    endpoint: str = model_url or url
+    payload: dict = dict(data)
+    payload["stream"] = True
+    metrics.record_call()
+
+    async with get_budget() or nullcontext():
+        model_url, trial = pick_available(endpoint)
+        limiter = get_limiter(model_url)
+        breaker = get_breaker(model_url)
+        try:
+            await limiter.acquire()
+        except BaseException:
+            if trial:
+                breaker.end_trial()
+            raise
+        start: float = time.monotonic()
+        try:
+            session = await get_session()
+            async with session.post(model_url, json=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                response.raise_for_status()
+                async with aclosing(read_stream(response)) as chunks:
+                    async for text in chunks:
+                        yield text
+        except GeneratorExit:
+            # The caller stopped reading early, which still means the endpoint answered
+            record_success(model_url, time.monotonic() - start, endpoint, latency_class(payload))
+            raise
+        except Exception as e:
+            if is_overload(e):
+                record_failure(model_url)
+            raise
+        else:
+            record_success(model_url, time.monotonic() - start, endpoint, latency_class(payload))
+        finally:
+            limiter.release()
+            if trial:
+                breaker.end_trial()
+
+
+async def read_stream(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    if response.content_type != "text/event-stream":
+        async for chunk in response.content.iter_any():
+            text: str = decoder.decode(chunk)
+            if text:
+                yield text
+        return
+
+    buffer: str = ""
+    async for chunk in response.content.iter_any():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if not line.startswith("data:"):
+                continue
+            event: str = line[5:].strip()
+            if event == "[DONE]":
+                return
+            text = parse_event(event)
+            if text:
+                yield text
+
+
+def parse_event(event: str) -> str:
+    try:
+        parsed = json.loads(event)
+    except ValueError:
+        return event
+
+    if isinstance(parsed, str):
+        return parsed
+    if isinstance(parsed, dict):
+        for key in ["token", "text", "content", "response"]:
+            if isinstance(parsed.get(key), str):
+                return parsed[key]
+        choices = parsed.get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content") or choices[0].get("text") or ""
+    return ""
+
+
+def completion_start(prompt: str, response_text: str) -> int | None:
+    """
+    Where the completion starts in a response: after the last assistant
+    marker when the server echoed the prompt, 0 when it did not, None while
+    an echo is still arriving. The echo does not have to match the prompt
+    exactly, only its chat markers count.
+    """
+    position: int = response_text.rfind(assistant_marker)
+    if position != -1:
+        return position + len(assistant_marker)
+    if assistant_marker in prompt and any(marker in response_text for marker in echo_markers):
+        return None
+    return 0
+
+
+def completion_text(prompt: str, response_text: str) -> str | None:
+    """
+    Returns the assistant part of a partial response. Servers that echo the
+    prompt are waited on until the echo is complete, so numbers or JSON in
+    the system prompt are never mistaken for an answer.
+    """
+    start: int | None = completion_start(prompt, response_text)
+    return response_text[start:] if start is not None else None
+
+
+async def request_until(data: dict, model_url: str = "", timeout: int = 300, parser: Callable[[str], str | None] = None) -> tuple[str, bool]:
+    """
+    Streams a completion until parser recognises a result in it.
+
+    Returns (text, complete): the parser's result and False when the stream was
+    cut short, or the whole response text and True when it ran to the end or
+    reached a stop sequence.
+    """
+    response_text: str = ""
+    chunks = stream(data, model_url, timeout)
+    try:
+        async for chunk in chunks:
+            response_text += chunk
+            section: str | None = completion_text(data.get("prompt", ""), response_text)
+            if section is None:
+                continue
+            if find_stop(data, response_text) != -1:
+                break
+            result: str | None = parser(section)
+            if result is not None:
+                stats["early_aborts"] += 1
+                return result, False
+    finally:
+        await chunks.aclose()
+
+    return response_text, True
+
+
+async def request(data: dict, model_url: str = "", timeout: int = 300, use_cache: bool = True, refresh: bool = False, batch: bool = False, parser: Callable[[str], str | None] = None, hedge: bool = False) -> str:
+    """
+    Sends a request through the response cache and returns the raw response text.
+
+    use_cache=False bypasses the cache entirely; use it for calls that
+    sample the same prompt several times. refresh=True skips the lookup but
+    stores the new response, which retry loops use after a bad answer.
+
+    Concurrent cached calls for the same key share one upstream request.
+    batch=True lets short prompts be sent together with other queued prompts.
+    With a parser the completion is streamed and cut off as soon as the parser
+    returns a result; such calls are not batched or coalesced, and only
+    responses that ran to the end are stored. hedge=True allows a duplicate
+    request for short prompts once the first one is slower than usual.
+    """
+    if not on_client_loop():
+        return await run_async(request(data, model_url, timeout, use_cache, refresh, batch, parser, hedge))
+
+    model_url = model_url or url
+
+    if not use_cache:
+        if parser is not None:
+            return (await send_until(data, model_url, timeout, parser, hedge))[0]
+        return await send(data, model_url, timeout, batch, hedge)
+
+    key: str = cache.make_key(model_url, data)
+
+    if not refresh:
+        cached: str | None = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+
+    if parser is not None:
+        response_text, complete = await send_until(data, model_url, timeout, parser, hedge)
+        if complete:
+            await asyncio.to_thread(cache.put, key, response_text)
+        return response_text
+
+    if not refresh:
+        task: asyncio.Task | None = _in_flight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+    task = asyncio.ensure_future(fetch_and_store(key, data, model_url, timeout, batch, hedge))
+    _in_flight[key] = task
+    task.add_done_callback(lambda done: release(key, done))
+
+    # Shielded so one cancelled caller does not cancel the request for the others
+    return await asyncio.shield(task)
+
+
+def release(key: str, task: asyncio.Task) -> None:
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+    # Mark the exception as retrieved in case every waiting caller was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def send_until(data: dict, model_url: str, timeout: int, parser: Callable[[str], str | None], hedge: bool = False) -> tuple[str, bool]:
+    if hedge:
+        response_text, complete = await hedged(lambda: request_until(data, model_url, timeout, parser), model_url, latency_class(data))
+    else:
+        response_text, complete = await request_until(data, model_url, timeout, parser)
+
+    if complete:
+        return finish(data, response_text), True
+    metrics.record(data, response_text, early_abort=True)
+    return response_text, False
+
+
+async def fetch_and_store(key: str, data: dict, model_url: str, timeout: int, batch: bool = False, hedge: bool = False) -> str:
+    response_text: str = await send(data, model_url, timeout, batch, hedge)
+    await asyncio.to_thread(cache.put, key, response_text)
+    return response_text
+
+
+async def request_n(data: dict, n: int, model_url: str = "", timeout: int = 300, parser: Callable[[str], str | None] = None, hedge: bool = False) -> list[str]:
+    """
+    Samples n completions of one prompt, never from the cache.
+
+    Sent as a single request with n and num_return_sequences so the prompt is
+    prefilled once. Endpoints that answer with a single completion or reject
+    the parameters are remembered, and the missing samples are requested
+    concurrently instead.
+    Samples that failed are left out; an error is raised only if all did.
+
+    parser picks the result out of every sample; samples requested one by
+    one are streamed and cut off as soon as it has one, as in request.
+    hedge=True allows a duplicate request when the answer is slower than usual.
+    """
+    if not on_client_loop():
+        return await run_async(request_n(data, n, model_url, timeout, parser, hedge))
+
+    model_url = model_url or url
+    samples: list[str] = []
+
+    if n > 1 and n_support.get(model_url) is not False:
+        payload: dict = dict(data)
+        payload["n"] = n
+        payload["num_return_sequences"] = n
+        try:
+            if hedge:
+                response_text: str = await hedged(lambda: post(payload, model_url, timeout), model_url, latency_class(payload))
+            else:
+                response_text = await post(payload, model_url, timeout)
+            samples = parse_samples(response_text)
+        except aiohttp.ClientResponseError as e:
+            if is_overload(e):
+                raise
+            # The endpoint rejected the extra parameters
+            samples = []
+        if len(samples) == n:
+            n_support[model_url] = True
+            stats["multi_sample_requests"] += 1
+            return [pick_result(finish(data, sample), parser) for sample in samples]
+        if not n_support.get(model_url):
+            print(f"  ├─ ⚠️ {model_url.split('/')[-1]} returned {len(samples)} of {n} samples, requesting the rest separately")
+            n_support[model_url] = False
+        samples = [pick_result(finish(data, sample), parser) for sample in samples[:n]]
+        stats["multi_sample_fallbacks"] += 1
+
+    results: list = await asyncio.gather(
+        *[send_sample(data, model_url, timeout, parser, hedge) for _ in range(n - len(samples))],
+        return_exceptions=True
+    )
+    errors: list[BaseException] = [result for result in results if isinstance(result, BaseException)]
+    samples += [result for result in results if not isinstance(result, BaseException)]
+    if not samples and errors:
+        raise errors[0]
+    return samples
+
+
+async def send_sample(data: dict, model_url: str, timeout: int, parser: Callable[[str], str | None] = None, hedge: bool = False) -> str:
+    if parser is not None:
+        return pick_result((await send_until(data, model_url, timeout, parser, hedge))[0], parser)
+    return await send(data, model_url, timeout, hedge=hedge)
+
+
+def pick_result(sample: str, parser: Callable[[str], str | None] = None) -> str:
+    if parser is None:
+        return sample
+    section: str | None = completion_text("", sample)
+    result: str | None = parser(section) if section is not None else None
+    return result if result is not None else sample
+
+
+def parse_samples(response_text: str) -> list[str]:
+    """
+    Reads the completions out of a multi-sample response: a JSON list,
+    {"responses": [...]}, OpenAI style choices or Hugging Face style
+    generated_text entries. Anything else counts as one completion.
+    """
+    try:
+        parsed = json.loads(response_text)
+    except ValueError:
+        return [response_text]
+
+    if isinstance(parsed, dict):
+        parsed = parsed.get("responses") or parsed.get("choices") or parsed.get("generated_texts") or parsed
+    if not isinstance(parsed, list):
+        return [response_text]
+
+    samples: list[str] = []
+    for item in parsed:
+        if isinstance(item, dict):
+            item = item.get("text") or item.get("generated_text") or (item.get("message") or {}).get("content") or ""
+        samples.append(item if isinstance(item, str) else json.dumps(item))
+    return samples
+
+
+def request_sync(data: dict, model_url: str = "", timeout: int = 300, use_cache: bool = True, refresh: bool = False, batch: bool = False, parser: Callable[[str], str | None] = None, hedge: bool = False) -> str:
+    """
+    Blocking counterpart of request for synchronous callers and thread pools.
+    """
+    return run_sync(request(data, model_url, timeout, use_cache, refresh, batch, parser, hedge))
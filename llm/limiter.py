@@ -0,0 +1,137 @@
+import time
+import asyncio
+from collections import deque
+
+initial_limit: float = 4 # Concurrent requests allowed before any feedback
+min_limit: float = 1
+max_limit: float = 64
+decrease_factor: float = 0.5 # Multiplicative decrease on overload
+latency_tolerance: float = 3.0 # Latency above baseline * tolerance counts as overload
+baseline_smoothing: float = 0.05 # How fast a latency baseline drifts upwards
+global_limit: int = 0 # Requests in flight across all endpoints together, 0 leaves only the per-endpoint limits
+
+
+class AdaptiveLimiter:
+    """
+    Additive increase / multiplicative decrease concurrency limit for one endpoint.
+
+    Every successful call that finishes near the baseline latency grows the
+    limit by 1/limit, i.e. by about one slot per round trip. A 5xx, 429,
+    timeout, connection error or a latency far above the baseline halves it,
+    at most once per baseline latency so one burst of failures counts once.
+
+    Baselines are kept per latency class, e.g. per prompt and output budget,
+    so a long completion is not taken for overload next to short scores.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name: str = name
+        self.limit: float = initial_limit
+        self.in_flight: int = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.baselines: dict[str, float] = {}
+        self.last_decrease: float = 0.0
+
+    @property
+    def baseline_latency(self) -> float | None:
+        """
+        The fastest class baseline, roughly one round trip to the endpoint.
+        """
+        return min(self.baselines.values()) if self.baselines else None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.waiters)
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self.in_flight += 1
+            return
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation, pass it on
+                self.release()
+            else:
+                self.waiters.remove(future)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.wake()
+
+    def wake(self) -> None:
+        while self.waiters and self.in_flight < int(self.limit):
+            future: asyncio.Future = self.waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def record_success(self, latency: float, latency_class: str = "") -> None:
+        baseline: float | None = self.baselines.get(latency_class)
+        if baseline is None or latency < baseline:
+            baseline = latency
+        else:
+            baseline += baseline_smoothing * (latency - baseline)
+        self.baselines[latency_class] = baseline
+
+        if latency > baseline * latency_tolerance:
+            self.decrease()
+        else:
+            self.limit = min(max_limit, self.limit + 1 / self.limit)
+            self.wake()
+
+    def record_failure(self) -> None:
+        self.decrease()
+
+    def decrease(self) -> None:
+        now: float = time.monotonic()
+        if now - self.last_decrease < (self.baseline_latency or 1.0):
+            return
+        self.last_decrease = now
+        self.limit = max(min_limit, self.limit * decrease_factor)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "baseline_latency": round(self.baseline_latency, 3) if self.baseline_latency is not None else None
+        }
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(model_url: str) -> AdaptiveLimiter:
+    if model_url not in _limiters:
+        _limiters[model_url] = AdaptiveLimiter(model_url)
+    return _limiters[model_url]
+
+
+_budget: asyncio.Semaphore | None = None
+_budget_key: tuple | None = None
+
+
+def get_budget() -> asyncio.Semaphore | None:
+    """
+    The semaphore enforcing global_limit, None when there is no global cap.
+    Only used on the client loop; a new one is made if the loop or the limit changed.
+    """
+    global _budget, _budget_key
+
+    if global_limit <= 0:
+        return None
+    key: tuple = (asyncio.get_running_loop(), global_limit)
+    if _budget is None or _budget_key != key:
+        _budget = asyncio.Semaphore(global_limit)
+        _budget_key = key
+    return _budget
+
+
+def snapshot() -> dict:
+    return {model_url: limiter.snapshot() for model_url, limiter in _limiters.items()}
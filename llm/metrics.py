@@ -0,0 +1,69 @@
+import threading
+from contextvars import ContextVar
+
+from llm.tokenizer import count_tokens
+
+# Prompt name -> counters, "" collects calls that did not name their prompt
+_metrics: dict[str, dict] = {}
+_lock = threading.Lock()
+
+# Counter of upstream requests made by the current task and the tasks it
+# starts, e.g. one per session in a batch run. None outside count_calls.
+_call_counter: ContextVar[dict | None] = ContextVar("call_counter", default=None)
+
+
+def new_entry() -> dict:
+    return {
+        "calls": 0,
+        "budget_tokens": 0,
+        "output_tokens": 0,
+        "budget_exhausted": 0,
+        "stopped": 0,
+        "early_aborts": 0
+    }
+
+
+def record(data: dict, response_text: str, stopped: bool = False, early_abort: bool = False) -> None:
+    """
+    Records one completed upstream call: the output budget it asked for, the
+    tokens it actually produced, and whether it ended on a stop sequence, ran
+    into its budget or was cut off by a streaming parser.
+    """
+    budget: int = data.get("max_length") or 0
+    output_tokens: int = count_tokens(response_text)
+
+    with _lock:
+        entry: dict = _metrics.setdefault(data.get("prompt_name", ""), new_entry())
+        entry["calls"] += 1
+        entry["budget_tokens"] += budget
+        entry["output_tokens"] += output_tokens
+        entry["stopped"] += stopped
+        entry["early_aborts"] += early_abort
+        if budget and output_tokens >= budget:
+            entry["budget_exhausted"] += 1
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {name: dict(entry) for name, entry in _metrics.items()}
+
+
+def reset() -> None:
+    with _lock:
+        _metrics.clear()
+
+
+def count_calls() -> dict:
+    """
+    Starts counting the upstream requests of the current context and returns
+    the counter, which keeps being updated as requests are sent.
+    """
+    counter: dict = {"calls": 0}
+    _call_counter.set(counter)
+    return counter
+
+
+def record_call() -> None:
+    counter: dict | None = _call_counter.get()
+    if counter is not None:
+        counter["calls"] += 1
@@ -0,0 +1,112 @@
+import os
+import hashlib
+import importlib
+import threading
+from types import ModuleType
+
+from llm.tokenizer import count_tokens
+
+default_max_length: int = 64000 # Output budget for prompts that do not declare one
+default_stop: list[str] = ["<|im-end|>"] # Stop sequences for prompts that do not declare any
+
+
+def get_part(prompt_dict: dict, key: str) -> str:
+    part = prompt_dict[key] if key in prompt_dict else ""
+    # Some prompt modules give a part as a list of sections
+    return "\n".join(part) if isinstance(part, list) else part
+
+
+class PromptTemplate:
+    """
+    One prompt module rendered once: everything around the user input is
+    built at load time, so create_prompt is a single string concatenation.
+    """
+
+    def __init__(self, name: str, prompt_dict: dict, start_prompt: str = "", end_prompt: str = ""):
+        self.name: str = name
+        self.prompt_dict: dict = prompt_dict
+
+        user: str = get_part(prompt_dict, "user")
+        assistant: str = get_part(prompt_dict, "assistant")
+        self.system_prompt: str = start_prompt + get_part(prompt_dict, "system") + end_prompt
+
+        self.prefix: str = f"""<|im-system|>
+{self.system_prompt}
+<|im-end|>
+<|im-user|>
+"""
+        self.suffix: str = f"""
+{user}
+<|im-end|>
+<|im-assistant|>
+{assistant}"""
+
+        self.max_length: int = prompt_dict["max_length"] if "max_length" in prompt_dict else default_max_length
+        self.stop: list[str] = prompt_dict["stop"] if "stop" in prompt_dict else default_stop
+        self.prompt_class: str = prompt_dict["prompt_class"] if "prompt_class" in prompt_dict else ""
+
+        self.template_tokens: int = count_tokens(self.system_prompt + user + assistant)
+        # Stable across runs and processes, changes whenever the rendered template does
+        self.hash: str = hashlib.sha256((self.prefix + "\0" + self.suffix).encode("utf-8")).hexdigest()[:16]
+        # A prompt module can declare a version to bump only when its meaning
+        # changes, so results memoized for it survive rewording and formatting
+        self.version: str = str(prompt_dict["version"]) if "version" in prompt_dict else self.hash
+
+    def render(self, user_input: str = "") -> str:
+        return self.prefix + user_input + self.suffix
+
+
+class PromptRegistry:
+    """
+    Loads every module of a prompts package once and keeps a PromptTemplate
+    per module name. Names that were not found at load time are imported on
+    first use, so prompt files added later still work.
+    """
+
+    def __init__(self, package: str, start_prompt: str = "", end_prompt: str = ""):
+        self.package: str = package
+        self.start_prompt: str = start_prompt
+        self.end_prompt: str = end_prompt
+        self.modules: dict[str, ModuleType | None] = {}
+        self.templates: dict[str, PromptTemplate] = {}
+        self.loaded: bool = False
+        self.lock = threading.RLock()
+
+    def names(self) -> list[str]:
+        package: ModuleType = importlib.import_module(self.package)
+        prompts_dir: str = os.path.dirname(package.__file__)
+        return sorted(filename[:-3] for filename in os.listdir(prompts_dir) if filename.endswith(".py") and not filename.startswith("__"))
+
+    def load(self) -> None:
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            for name in self.names():
+                self.get_module(name)
+
+    def get_module(self, name: str) -> ModuleType | None:
+        with self.lock:
+            if name not in self.modules:
+                try:
+                    self.modules[name] = importlib.import_module(f"{self.package}.{name}")
+                except Exception as e:
+                    print(f"⚠️ Could not load prompt module {self.package}.{name}: {e}")
+                    self.modules[name] = None
+            return self.modules[name]
+
+    def get_prompt_dict(self, name: str) -> dict:
+        module: ModuleType | None = self.get_module(name)
+        if module is not None and hasattr(module, "prompt_dict"):
+            return module.prompt_dict
+        return {}
+
+    def get(self, name: str) -> PromptTemplate:
+        with self.lock:
+            if name not in self.templates:
+                self.templates[name] = PromptTemplate(name, self.get_prompt_dict(name), self.start_prompt, self.end_prompt)
+            return self.templates[name]
+
+    def hashes(self) -> dict[str, str]:
+        self.load()
+        return {name: self.get(name).hash for name in self.modules}
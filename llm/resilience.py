@@ -0,0 +1,216 @@
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable
+
+backoff_base: float = 0.5 # Seconds, doubled on every attempt before jitter
+backoff_cap: float = 30.0 # Upper bound for a single wait
+retry_after_cap: float = 120.0 # Upper bound for a server supplied Retry-After
+
+failure_threshold: int = 5 # Consecutive failures that open the circuit
+reset_timeout: float = 30.0 # Seconds the circuit stays open before a trial request
+
+hedge_min_samples: int = 20 # Latencies needed before hedging starts
+hedge_percentile: float = 0.95 # Duplicate request is sent after this latency percentile
+
+
+class EndpointError(ConnectionError):
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after: float | None = retry_after
+
+
+class CircuitOpenError(EndpointError):
+    pass
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Reads a Retry-After header given either in seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        seconds: float = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), retry_after_cap)
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    if isinstance(error, EndpointError):
+        return error.retry_after
+    headers = getattr(error, "headers", None)
+    if headers is None and getattr(error, "response", None) is not None:
+        headers = error.response.headers
+    if headers is None:
+        return None
+    return parse_retry_after(headers.get("Retry-After"))
+
+
+def backoff_delay(attempt: int, error: BaseException | None = None) -> float:
+    """
+    Exponential backoff with full jitter, unless the server said how long to wait.
+    """
+    retry_after: float | None = get_retry_after(error) if error is not None else None
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(backoff_cap, backoff_base * 2 ** attempt))
+
+
+async def wait_before_retry(attempt: int, error: BaseException | None = None) -> None:
+    delay: float = backoff_delay(attempt, error)
+    if delay > 0:
+        print(f"  ├─ Waiting {delay:.1f}s before retrying...")
+        await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an endpoint is down.
+
+    After failure_threshold consecutive overload failures the circuit opens and
+    calls raise CircuitOpenError without touching the network. Once
+    reset_timeout has passed a single trial call is let through; its success
+    closes the circuit and its failure opens it again. A trial that ends
+    without either, because it was cancelled or the request itself was
+    rejected, hands the trial to the next call with end_trial. A trial that
+    never reports back is given up after reset_timeout.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name: str = name
+        self.state: str = "closed"
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.trial_started: float = 0.0
+        self.lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """
+        Raises CircuitOpenError while calls are not allowed. Returns True when
+        this call is the trial of a half open circuit; the caller must then
+        call end_trial once it is done.
+        """
+        with self.lock:
+            if self.state == "closed":
+                return False
+            now: float = time.monotonic()
+            if self.state == "open" and now - self.opened_at >= reset_timeout or self.state == "half_open" and now - self.trial_started >= reset_timeout:
+                self.state = "half_open"
+                self.trial_started = now
+                return True
+            since: float = self.trial_started if self.state == "half_open" else self.opened_at
+            remaining: float = max(0.0, reset_timeout - (now - since))
+            raise CircuitOpenError(f"Circuit open for {self.name}, endpoint failing. Retry in {remaining:.0f} seconds.", remaining)
+
+    def is_available(self) -> bool:
+        """
+        True when before_call would let a call through: the circuit is
+        closed, or a trial may start now. False while it is open or a trial
+        is already in flight.
+        """
+        now: float = time.monotonic()
+        if self.state == "open":
+            return now - self.opened_at >= reset_timeout
+        if self.state == "half_open":
+            return now - self.trial_started >= reset_timeout
+        return True
+
+    def end_trial(self) -> None:
+        """
+        Called after a trial call. If it neither closed nor reopened the
+        circuit, the next call becomes the trial.
+        """
+        with self.lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic() - reset_timeout
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= failure_threshold:
+                if self.state != "open":
+                    print(f"  ├─ ⚠️ Circuit opened for {self.name.split('/')[-1]} after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 200):
+        self.latencies: deque[float] = deque(maxlen=size)
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def percentile(self, fraction: float) -> float | None:
+        if len(self.latencies) < hedge_min_samples:
+            return None
+        ordered: list[float] = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_trackers: dict[str, LatencyTracker] = {}
+
+
+def get_breaker(model_url: str) -> CircuitBreaker:
+    if model_url not in _breakers:
+        _breakers[model_url] = CircuitBreaker(model_url)
+    return _breakers[model_url]
+
+
+def get_tracker(model_url: str, latency_class: str | None = None) -> LatencyTracker:
+    """
+    Latencies of all calls to model_url, or with latency_class only of the
+    calls of that class.
+    """
+    key: str = model_url if latency_class is None else f"{model_url}#{latency_class}"
+    if key not in _trackers:
+        _trackers[key] = LatencyTracker()
+    return _trackers[key]
+
+
+async def hedged(make_call: Callable[[], Awaitable], model_url: str, latency_class: str = ""):
+    """
+    Runs make_call and, if it has not finished by the p95 latency of the
+    endpoint's calls of the same class, starts one duplicate. The first
+    successful result wins and the other call is cancelled. Without enough
+    latency history it is a plain call.
+    """
+    threshold: float | None = get_tracker(model_url, latency_class).percentile(hedge_percentile)
+    if threshold is None:
+        return await make_call()
+
+    first = asyncio.ensure_future(make_call())
+    pending: set = {first}
+    error: BaseException | None = None
+    try:
+        # Inside the try, so a caller cancelled while waiting also cancels the call
+        done, _ = await asyncio.wait({first}, timeout=threshold)
+        if done:
+            return first.result()
+
+        pending.add(asyncio.ensure_future(make_call()))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,110 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+import llm.client as client
+from llm.resilience import EndpointError
+
+T = TypeVar("T")
+
+default_route: str = "generation" # Route for prompts without a class or an explicit mapping
+
+# Route name -> backends tried in order and the timeout for each attempt.
+# Put a small local model first in "scoring" to take the tiny classification
+# prompts off the big model, e.g. "http://localhost:8080/completion".
+routes: dict[str, dict] = {
+    "generation": {"urls": [client.url], "timeout": 300},
+    "scoring": {"urls": [client.url], "timeout": 60}
+}
+
+# Prompt name -> route name, overrides the class declared by the prompt
+prompt_routes: dict[str, str] = {}
+
+
+class Route:
+    def __init__(self, name: str, urls: list[str], timeout: int = 300):
+        self.name: str = name
+        self.urls: list[str] = urls
+        self.timeout: int = timeout
+
+
+class Router:
+    """
+    Maps prompt names and prompt classes to routes. An explicit prompt name
+    mapping wins over the class the prompt declares; anything unknown goes to
+    the default route.
+    """
+
+    def __init__(self, routes: dict[str, dict], prompt_routes: dict[str, str] | None = None, default: str = default_route):
+        self.routes: dict[str, Route] = {
+            name: Route(name, route["urls"], route.get("timeout", 300)) for name, route in routes.items()
+        }
+        self.prompt_routes: dict[str, str] = prompt_routes or {}
+        self.default: str = default
+
+    def resolve(self, prompt_name: str = "", prompt_class: str = "") -> Route:
+        name: str = self.prompt_routes.get(prompt_name, prompt_class)
+        return self.routes.get(name) or self.routes[self.default]
+
+    def urls(self) -> list[str]:
+        return list(dict.fromkeys(url for route in self.routes.values() for url in route.urls))
+
+
+async def call(route: Route, make_call: Callable[[str], Awaitable[T]]) -> T:
+    """
+    Runs make_call with the route's first backend URL, moving to the next
+    one when the endpoint is down, overloaded or too slow. Other errors,
+    and the error from the last backend, are raised.
+    """
+    error: Exception | None = None
+    for index, model_url in enumerate(route.urls):
+        if error is not None:
+            print(f"  ├─ ⚠️ Falling back to {model_url.split('/')[-1]} for {route.name or 'request'}: {str(error)[:100]}")
+        try:
+            return await make_call(model_url)
+        except Exception as e:
+            if not should_fall_back(e) or index == len(route.urls) - 1:
+                raise
+            error = e
+    raise error
+
+
+def should_fall_back(error: Exception) -> bool:
+    return isinstance(error, (EndpointError, asyncio.TimeoutError)) or client.is_overload(error)
+
+
+_router: Router | None = None
+_configured: set[str] = set() # Route names set by configure rather than the defaults above
+
+
+def configure(new_routes: dict[str, dict], new_prompt_routes: dict[str, str] | None = None) -> None:
+    """
+    Adds routes and prompt mappings from an agent's settings to this module's,
+    so calls through get_router, e.g. the tools, follow the same config.
+
+    The first agent's route replaces the default of the same name; routes
+    of later agents are merged into it, their backends tried after the ones
+    already there. A prompt mapping that is already set is kept.
+    """
+    global _router
+
+    for name, route in new_routes.items():
+        if name not in _configured:
+            routes[name] = {"urls": list(route["urls"]), "timeout": route.get("timeout", 300)}
+            _configured.add(name)
+        else:
+            routes[name]["urls"] = list(dict.fromkeys(routes[name]["urls"] + route["urls"]))
+            routes[name]["timeout"] = max(routes[name].get("timeout", 300), route.get("timeout", 300))
+    for prompt_name, route_name in (new_prompt_routes or {}).items():
+        prompt_routes.setdefault(prompt_name, route_name)
+    _router = None
+
+
+def get_router() -> Router:
+    """
+    The router built from this module's routes, for callers without their own settings.
+    """
+    global _router
+
+    if _router is None:
+        _router = Router(routes, prompt_routes)
+    return _router
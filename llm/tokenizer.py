@@ -0,0 +1,170 @@
+import os
+import re
+import json
+import math
+from functools import lru_cache
+
+project_root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+tokenizer_file: str = os.path.join(project_root, "input", "tokenizer.json") # HF tokenizer.json of the served model
+context_window: int = 32768 # Prompt plus completion tokens the model accepts
+min_output_tokens: int = 16 # Context-capped output budget never goes below this, even for huge prompts
+
+# GPT-2 style pre-tokenizer, written for the stdlib re module
+byte_level_pattern = re.compile(r"""'s|'t|'re|'ve|'m|'ll|'d| ?[^\W\d_]+| ?\d+| ?[^\s\w]+|\s+(?!\S)|\s+""")
+metaspace_pattern = re.compile(r"▁?[^▁]+|▁+")
+approximate_pattern = re.compile(r"\w+|[^\w\s]")
+
+
+def bytes_to_unicode() -> dict[int, str]:
+    """
+    The reversible byte to printable character table used by byte-level BPE vocabularies.
+    """
+    printable: list[int] = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    characters: list[int] = printable[:]
+    extra: int = 0
+    for byte in range(256):
+        if byte not in printable:
+            printable.append(byte)
+            characters.append(256 + extra)
+            extra += 1
+    return dict(zip(printable, [chr(character) for character in characters]))
+
+
+class BPETokenizer:
+    """
+    Counts tokens with the served model's BPE merges.
+
+    Supports byte-level vocabularies (GPT-2, Qwen) and metaspace ones
+    (Llama, Mistral) with byte fallback. Words are merged independently and
+    memoised, so repeated text costs a dictionary lookup.
+    """
+
+    def __init__(self, vocab: dict[str, int], merges: list[tuple[str, str]], byte_level: bool = True, byte_fallback: bool = False):
+        self.vocab: dict[str, int] = vocab
+        self.ranks: dict[tuple[str, str], int] = {pair: rank for rank, pair in enumerate(merges)}
+        self.byte_level: bool = byte_level
+        self.byte_fallback: bool = byte_fallback
+        self.byte_table: dict[int, str] = bytes_to_unicode()
+        self.word_count = lru_cache(maxsize=65536)(self.bpe_count)
+
+    def pre_tokenize(self, text: str) -> list[str]:
+        if self.byte_level:
+            return ["".join(self.byte_table[byte] for byte in piece.encode("utf-8")) for piece in byte_level_pattern.findall(text)]
+        return metaspace_pattern.findall("▁" + text.replace(" ", "▁"))
+
+    def bpe_count(self, word: str) -> int:
+        symbols: list[str] = list(word)
+        while len(symbols) > 1:
+            best_rank: int | None = None
+            best_index: int = -1
+            for index in range(len(symbols) - 1):
+                rank = self.ranks.get((symbols[index], symbols[index + 1]))
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_index = index
+            if best_rank is None:
+                break
+            symbols[best_index:best_index + 2] = [symbols[best_index] + symbols[best_index + 1]]
+
+        count: int = 0
+        for symbol in symbols:
+            if symbol in self.vocab or not self.byte_fallback:
+                count += 1
+            else:
+                count += len(symbol.encode("utf-8"))
+        return count
+
+    def count(self, text: str) -> int:
+        return sum(self.word_count(word) for word in self.pre_tokenize(text))
+
+
+def load(path: str) -> BPETokenizer:
+    with open(path, "r", encoding="utf-8") as file:
+        tokenizer_json: dict = json.load(file)
+
+    model: dict = tokenizer_json["model"]
+    if model.get("type") != "BPE":
+        raise ValueError(f"Unsupported tokenizer model type: {model.get('type')}")
+
+    merges: list[tuple[str, str]] = []
+    for merge in model["merges"]:
+        pair = merge.split(" ", 1) if isinstance(merge, str) else merge
+        merges.append((pair[0], pair[1]))
+
+    vocab: dict[str, int] = model["vocab"]
+    byte_level: bool = "ByteLevel" in json.dumps(tokenizer_json.get("pre_tokenizer")) or "Ġ" in "".join(list(vocab)[:1000])
+    return BPETokenizer(vocab, merges, byte_level, bool(model.get("byte_fallback")))
+
+
+_tokenizer: BPETokenizer | None = None
+_tokenizer_loaded: bool = False
+
+
+def get_tokenizer() -> BPETokenizer | None:
+    """
+    Loads tokenizer_file once. Returns None when there is no usable file, in
+    which case counts fall back to the approximation.
+    """
+    global _tokenizer, _tokenizer_loaded
+
+    if not _tokenizer_loaded:
+        _tokenizer_loaded = True
+        if os.path.exists(tokenizer_file):
+            try:
+                _tokenizer = load(tokenizer_file)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Could not load tokenizer from {tokenizer_file}, using approximate counts: {e}")
+    return _tokenizer
+
+
+def approximate_count(text: str) -> int:
+    """
+    Roughly one token per four characters of a word and one per punctuation mark.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in approximate_pattern.findall(text))
+
+
+def count_tokens(text: str) -> int:
+    tokenizer: BPETokenizer | None = get_tokenizer()
+    if tokenizer is not None:
+        return tokenizer.count(text)
+    return approximate_count(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Returns the longest prefix of text that fits in max_tokens.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    low: int = 0
+    high: int = len(text)
+    while low < high:
+        middle: int = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def output_budget(prompt: str, max_length: int) -> int:
+    """
+    Caps a requested completion length so prompt plus completion fits in the
+    context window. Only that cap is floored at min_output_tokens; a smaller
+    budget the prompt declares itself is kept.
+    """
+    available: int = context_window - count_tokens(prompt)
+    return min(max_length, max(min_output_tokens, available))
+
+
+if __name__ == "__main__":
+    assert output_budget("Score the content.", 8) == 8, "A declared budget must not be raised"
+    assert output_budget("word " * context_window, 8) == 8
+    assert output_budget("word " * context_window, 500) == min_output_tokens
+
+    text: str = input("Enter text to count tokens: ")
+    source: str = tokenizer_file if get_tokenizer() is not None else "approximation"
+    print(f"Token count: {count_tokens(text)} ({source})")
@@ -2,9 +2,10 @@ import time
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from task_agent.llm.api import request as api_request
+from llm.resilience import CircuitOpenError, backoff_delay
 
 def generate_prompt(system_prompt: str, user_prompt: str) -> str:
     return f"""
@@ -25,10 +26,13 @@ def send_llm_request(prompt: str, max_retries: int = 3, timeout: int = 300) :
             print(f"Sending LLM request (attempt {attempt+1}/{max_retries})...")
             response = api_request(data, timeout=timeout)
             return response
+        except CircuitOpenError as e:
+            print(f"API request failed: {str(e)}")
+            raise
         except Exception as e:
             if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"API request failed: {str(e)}. Retrying in {wait_time} seconds...")
+                wait_time = backoff_delay(attempt, e)
+                print(f"API request failed: {str(e)}. Retrying in {wait_time:.1f} seconds...")
                 time.sleep(wait_time)
             else:
                 error_msg = f"Failed to connect to LLM API after {max_retries} attempts: {str(e)}"
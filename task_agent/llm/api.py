@@ -1,33 +1,38 @@
-import requests
+import asyncio
+import aiohttp
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+import llm.client as client
+import llm.tokenizer as tokenizer
+from llm.resilience import CircuitOpenError, EndpointError, parse_retry_after
 
 url = "https://www.northbeach.fi/dolphin"
 
 
-def request(data, timeout=300) -> str:
-    data["max_length"] = data.get("max_length", 64000)
-    
+def request(data, timeout=300, use_cache=True) -> str:
+    data["max_length"] = tokenizer.output_budget(data["prompt"], data.get("max_length", 64000))
+    data.setdefault("stop", ["<|im-end|>"])
+
     try:
-        response = requests.post(url, json=data, timeout=timeout)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        result = clean_response(response.text)
+        response_text = client.request_sync(data, url, timeout, use_cache=use_cache)
+        result = clean_response(response_text)
         return result
-    except requests.exceptions.HTTPError as err:
-        if err.response.status_code == 502:
-            raise ConnectionError(f"LLM API server returned 502 Bad Gateway. The service may be down or overloaded.")
-        raise ConnectionError(f"HTTP Error: {err}")
-    except requests.exceptions.ConnectionError:
-        raise ConnectionError(f"Failed to connect to LLM API at {url}. Check your internet connection or the API endpoint.")
-    except requests.exceptions.Timeout:
-        raise ConnectionError(f"Request to LLM API timed out after {timeout} seconds.")
-    except requests.exceptions.RequestException as err:
-        raise ConnectionError(f"Request error: {err}")
-    
+    except CircuitOpenError:
+        raise
+    except aiohttp.ClientResponseError as err:
+        retry_after = parse_retry_after(err.headers.get("Retry-After") if err.headers else None)
+        if err.status == 502:
+            raise EndpointError(f"LLM API server returned 502 Bad Gateway. The service may be down or overloaded.", retry_after)
+        raise EndpointError(f"HTTP Error: {err}", retry_after)
+    except asyncio.TimeoutError:
+        raise EndpointError(f"Request to LLM API timed out after {timeout} seconds.")
+    except aiohttp.ClientConnectionError:
+        raise EndpointError(f"Failed to connect to LLM API at {url}. Check your internet connection or the API endpoint.")
+    except aiohttp.ClientError as err:
+        raise EndpointError(f"Request error: {err}")    
     
 def clean_response(response) -> str:
     if "<|im-assistant|>" in response:
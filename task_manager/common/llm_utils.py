@@ -1,5 +1,6 @@
 import llm.api as api
 import time
+from llm.resilience import CircuitOpenError, backoff_delay
 
 def generate_prompt(system_prompt: str, user_prompt: str) -> str:
     return f"""
@@ -20,10 +21,13 @@ def send_llm_request(prompt: str, max_retries: int = 3, timeout: int = 300):
             print(f"Sending LLM request (attempt {attempt+1}/{max_retries})...")
             response = api.request(data, timeout=timeout)
             return response
+        except CircuitOpenError as e:
+            print(f"API request failed: {str(e)}")
+            raise
         except Exception as e:
             if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"API request failed: {str(e)}. Retrying in {wait_time} seconds...")
+                wait_time = backoff_delay(attempt, e)
+                print(f"API request failed: {str(e)}. Retrying in {wait_time:.1f} seconds...")
                 time.sleep(wait_time)
             else:
                 error_msg = f"Failed to connect to LLM API after {max_retries} attempts: {str(e)}"
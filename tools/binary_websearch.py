@@ -31,8 +31,8 @@ Question: {question}
 <|im-assistant|>
 """
     
-    data = {"prompt": prompt, "max_length": 5000}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 8, "stop": api.stop, "prompt_name": "binary_websearch", "prompt_class": "scoring"}
+    response = api.request_sync(data)
     
     return enforce_binary_output(response)
 
@@ -30,8 +30,8 @@ Then, provide a clear explanation for why it is true or false with supporting ev
 <|im-assistant|>
 """    
     
-    data = {"prompt": prompt, "max_length": 1024}
-    explanation_response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "explanation"}
+    explanation_response = api.request_sync(data)
     
     result = {
         "binary_result": binary_result,
@@ -34,7 +34,7 @@ Create only one message.
 <|im-assistant|>
 """    
     
-    data = {"prompt": prompt, "max_length": 1024}
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "explanation_websearch"}
     response = await api.request(data)
     
     result = {
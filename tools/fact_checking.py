@@ -23,8 +23,8 @@ Your output should be a structured analysis that helps journalists ensure the ac
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 1024}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "fact_checking"}
+    response = api.request_sync(data)
 
     return response
 
@@ -23,8 +23,8 @@ Your output should be a numbered list of headline options that a journalist coul
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 512, "stop": api.stop, "prompt_name": "headline_generation"}
+    response = api.request_sync(data)
 
     return response
 
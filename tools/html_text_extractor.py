@@ -45,8 +45,8 @@ Your output should be clean, well-formatted text that represents only the essent
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 2048}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 2048, "stop": api.stop, "prompt_name": "html_text_extractor"}
+    response = api.request_sync(data)
 
     return response
 
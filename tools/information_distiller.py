@@ -44,7 +44,7 @@ Respond with only one message.
 <|im-assistant|>
 """
  
-    data = {"prompt": prompt, "max_length": 5000}
+    data = {"prompt": prompt, "max_length": 5000, "stop": api.stop, "prompt_name": "information_distiller"}
     response = await api.request(data)
     result = response.strip()
     
@@ -24,8 +24,8 @@ Please enhance this input to be more precise, specific, and suitable for factual
 <|im-assistant|>
 """
 
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 512, "stop": api.stop, "prompt_name": "input_enhancement"}
+    response = api.request_sync(data)
     
     return response.strip()
 
@@ -45,8 +45,8 @@ Determine which option is closest to the truth based on the following research:
 <|im-assistant|>
 """    
     
-    data = {"prompt": prompt, "max_length": 1024}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "multi_option_websearch"}
+    response = api.request_sync(data)
     
     selected_option = extract_multi_option_selection(response, options)
     
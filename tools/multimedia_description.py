@@ -23,8 +23,8 @@ Your output should be effective captions that complement narrative text by provi
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 512, "stop": api.stop, "prompt_name": "multimedia_description"}
+    response = api.request_sync(data)
 
     return response
 
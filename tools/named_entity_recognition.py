@@ -23,8 +23,8 @@ Your output should be a comprehensive catalog of all the named entities in the t
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 1024}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "named_entity_recognition"}
+    response = api.request_sync(data)
 
     return response
 
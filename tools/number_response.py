@@ -24,8 +24,8 @@ Your output should be exactly one number, providing a clear numerical response t
 <|im-assistant|>
 """    
     
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 32, "stop": api.stop, "prompt_name": "number_response", "prompt_class": "scoring"}
+    response = api.request_sync(data, batch=True)
     
     return enforce_number_output(response)
 
@@ -37,8 +37,8 @@ Please provide a numerical answer based on the following web research:
 <|im-assistant|>
 """    
     
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 32, "stop": api.stop, "prompt_name": "numerical_websearch", "prompt_class": "scoring"}
+    response = api.request_sync(data)
     
     return enforce_number_output(response)
 
@@ -38,8 +38,8 @@ Create only one message.
 <|im-assistant|>
 """
 
-    data = {"prompt": prompt, "max_length": 5000}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "prompt_optimizer"}
+    response = api.request_sync(data)
     
     return response.strip()
 
@@ -44,8 +44,8 @@ Return only a comma-separated list of keywords.
 <|im-assistant|>
 """    
     print("[KEYWORD EXTRACTION] Sending API request for keyword extraction...")
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 512, "stop": api.stop, "prompt_name": "query_keywords"}
+    response = api.request_sync(data)
     
     print("[KEYWORD EXTRACTION] Processing API response...")
     keywords_response = extract_key_information(response, extraction_goal="Extract only the comma-separated keywords")["distilled_result"]
@@ -96,8 +96,8 @@ learning: 7
 <|im-assistant|>
 """    
     print("[IMPORTANCE ANALYSIS] Sending API request for importance ratings...")
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 512, "stop": api.stop, "prompt_name": "query_keywords"}
+    response = api.request_sync(data)
     
     print("[IMPORTANCE ANALYSIS] Processing importance ratings...")
     ratings = {}
@@ -40,8 +40,8 @@ Return only the optimized query without any additional text.
 <|im-assistant|>
 """
 
-    data = {"prompt": prompt, "max_length": 5000}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 128, "stop": api.stop, "prompt_name": "query_optimizer"}
+    response = api.request_sync(data)
     
     return response.strip()
 
@@ -23,8 +23,8 @@ Your output should provide a nuanced understanding of the emotional context and
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 512, "stop": api.stop, "prompt_name": "sentiment_analysis"}
+    response = api.request_sync(data, batch=True)
 
     return response
 
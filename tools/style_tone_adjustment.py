@@ -27,8 +27,8 @@ Target style:
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 1024}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "style_tone_adjustment"}
+    response = api.request_sync(data)
 
     return response
 
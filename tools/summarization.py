@@ -1,26 +1,29 @@
+import asyncio
 import tools.utils.api as api
 from tools.true_or_false import true_or_false
+from llm.tokenizer import count_tokens, truncate_to_tokens
 
 async def summarization(text, focus="", recursion_level=0):
-    MAX_CHARS = 5000
+    MAX_TOKENS = 1250
     MAX_RECURSION = 3
     
-    print(f"📝 Summarizing text ({len(text)} characters){' with focus on ' + focus if focus else ''}")
+    text_tokens = count_tokens(text)
+    print(f"📝 Summarizing text ({len(text)} characters, {text_tokens} tokens){' with focus on ' + focus if focus else ''}")
     print(f"  ├─ Recursion level: {recursion_level}/{MAX_RECURSION}")
     
     if recursion_level >= MAX_RECURSION:
         print(f"  ├─ ⚠️ Maximum recursion level reached ({MAX_RECURSION}). Forcing direct summarization.")
-        truncated_text = text[:MAX_CHARS]
+        truncated_text = truncate_to_tokens(text, MAX_TOKENS)
         print(f"  ├─ Text truncated from {len(text)} to {len(truncated_text)} characters.")
         text = truncated_text
-    elif len(text) > MAX_CHARS:
-        print(f"  ├─ Text exceeds maximum length ({len(text)}/{MAX_CHARS} characters)")
+    elif text_tokens > MAX_TOKENS:
+        print(f"  ├─ Text exceeds maximum length ({text_tokens}/{MAX_TOKENS} tokens)")
         print(f"  ├─ Breaking text into smaller parts...")
-        return await handle_long_text(text, focus, MAX_CHARS, recursion_level)
+        return await handle_long_text(text, focus, MAX_TOKENS, recursion_level)
     
     if focus:
         print(f"  ├─ Checking relevance to focus: \"{focus}\"")
-        if true_or_false(f"Focus: {focus} . Is the focus valid for this text: {text} ?"):
+        if await asyncio.to_thread(true_or_false, f"Focus: {focus} . Is the focus valid for this text: {text} ?"):
             print(f"  ├─ ✅ Text is relevant to the focus")
         else:
             print(f"  ├─ ⚠️ Text is not relevant to the focus. Skipping summarization.")
@@ -55,13 +58,13 @@ Respond with only one message.
 <|im-assistant|>
 """
  
-    data = {"prompt": prompt, "max_length": 5000}
+    data = {"prompt": prompt, "max_length": 5000, "stop": api.stop, "prompt_name": "summarization"}
     response = await api.request(data)
     print(f"  └─ Summary generated: {len(response)} characters")
     return response
 
-async def handle_long_text(text, focus, max_chars, recursion_level):
-    parts = split_text(text, max_chars)
+async def handle_long_text(text, focus, max_tokens, recursion_level):
+    parts = split_text(text, max_tokens, length=count_tokens)
     print(f"  ├─ Text split into {len(parts)} parts")
     
     # Limit to 5 parts if there are more than 5
@@ -92,8 +95,9 @@ async def handle_long_text(text, focus, max_chars, recursion_level):
     
     return combined_summary
 
-def split_text(text, max_chars):
-    if len(text) <= max_chars:
+def split_text(text, max_chars, length=len):
+    # max_chars is measured with length, so passing count_tokens splits by tokens
+    if length(text) <= max_chars:
         return [text]
         
     paragraphs = text.split("\n\n")
@@ -104,12 +108,12 @@ def split_text(text, max_chars):
     target_length = max_chars * 0.9
     
     for paragraph in paragraphs:
-        paragraph_length = len(paragraph)
+        paragraph_length = length(paragraph)
         if current_length + paragraph_length + 2 > max_chars and current_part:
             if current_length < target_length and paragraph_length > max_chars * 0.5:
                 sentences = split_into_sentences(paragraph)
                 for sentence in sentences:
-                    sentence_length = len(sentence)
+                    sentence_length = length(sentence)
                     if current_length + sentence_length + 1 <= max_chars:
                         if current_part:
                             current_part += " " + sentence
@@ -123,10 +127,11 @@ def split_text(text, max_chars):
                             current_part = sentence
                             current_length = sentence_length
                         elif sentence_length > max_chars:
-                            chunks = [sentence[i:i+max_chars] for i in range(0, len(sentence), max_chars)]
+                            chunk_size = max(1, len(sentence) * max_chars // sentence_length)
+                            chunks = [sentence[i:i+chunk_size] for i in range(0, len(sentence), chunk_size)]
                             parts.extend(chunks[:-1])
                             current_part = chunks[-1]
-                            current_length = len(current_part)
+                            current_length = length(current_part)
                         else:
                             current_part = sentence
                             current_length = sentence_length
@@ -147,7 +152,7 @@ def split_text(text, max_chars):
     
     final_parts = []
     for part in parts:
-        if len(part) <= max_chars:
+        if length(part) <= max_chars:
             final_parts.append(part)
         else:
             sentences = split_into_sentences(part)
@@ -156,7 +161,7 @@ def split_text(text, max_chars):
             current_length = 0
             
             for sentence in sentences:
-                sentence_length = len(sentence)
+                sentence_length = length(sentence)
                 if current_length + sentence_length + 1 > max_chars and current_part:
                     sentence_parts.append(current_part.strip())
                     current_part = sentence
@@ -178,11 +183,11 @@ def split_text(text, max_chars):
     i = 0
     while i < len(final_parts):
         current = final_parts[i]
-        current_length = len(current)
+        current_length = length(current)
         
         if current_length < target_length and i < len(final_parts) - 1:
             next_part = final_parts[i + 1]
-            next_length = len(next_part)
+            next_length = length(next_part)
             
             if current_length + next_length + 2 <= max_chars:
                 combined = current + "\n\n" + next_part
@@ -24,8 +24,8 @@ Your output should be a well-structured list of tasks that captures all the acti
 <|im-end|>
 <|im-assistant|>
 """
-    data = {"prompt": prompt, "max_length": 2048}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 2048, "stop": api.stop, "prompt_name": "task_extraction"}
+    response = api.request_sync(data)
     
     return response
 
@@ -54,8 +54,8 @@ Task List:
 <|im-end|>
 <|im-assistant|>
 """
-    data = {"prompt": prompt, "max_length": 2048}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 2048, "stop": api.stop, "prompt_name": "task_extraction"}
+    response = api.request_sync(data)
     
     return {
         "original_text": text,
@@ -23,8 +23,8 @@ Your output should be a well-organized chronological timeline that helps readers
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 1024}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "timeline_segmentation"}
+    response = api.request_sync(data)
 
     return response
 
@@ -23,8 +23,8 @@ Create only one message of the topic classification.
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 1024}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "topic_classification"}
+    response = api.request_sync(data)
 
     return response
 
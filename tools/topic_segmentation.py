@@ -22,8 +22,8 @@ Make sure that your output contains only this coherent context, without includin
 <|im-end|>
 <|im-assistant|>
 """    
-    data = {"prompt": prompt, "max_length": 1024}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 1024, "stop": api.stop, "prompt_name": "topic_segmentation"}
+    response = api.request_sync(data)
 
     return response
 
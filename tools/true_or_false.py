@@ -25,8 +25,8 @@ Your output should be exactly one word, providing a clear binary assessment of t
 <|im-assistant|>
 """    
     
-    data = {"prompt": prompt, "max_length": 5000}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 8, "stop": api.stop, "prompt_name": "true_or_false", "prompt_class": "scoring"}
+    response = api.request_sync(data, batch=True)
     
     return enforce_binary_output(response)
 
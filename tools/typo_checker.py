@@ -24,8 +24,8 @@ Please identify any typos or spelling errors in this text. If you find any, prov
 <|im-assistant|>
 """
 
-    data = {"prompt": prompt, "max_length": 512}
-    response = api.request(data)
+    data = {"prompt": prompt, "max_length": 512, "stop": api.stop, "prompt_name": "typo_checker"}
+    response = api.request_sync(data)
 
     response = distiller.extract_key_information(response)["distilled_result"]
     
@@ -1,16 +1,34 @@
-import aiohttp
+import llm.client as client
+import llm.tokenizer as tokenizer
+import llm.router as router
+from llm.router import Route
 from tools.utils.response_cleaner import clean_response
 
 url = "https://www.northbeach.fi/dolphin"
 
-async def request(data) -> str:
-    data["max_length"] = 5000
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=data) as response:
-            text = await response.text()
-            result = clean_response(text)
-            
-            return result
+max_length = 5000 # Output tokens for calls that do not set their own budget
+stop = ["<|im-end|>"]
+
+async def request(data, use_cache=True, batch=False, parser=None) -> str:
+    data["max_length"] = tokenizer.output_budget(data["prompt"], data.get("max_length", max_length))
+    data.setdefault("stop", stop)
+    route: Route = router.get_router().resolve(data.get("prompt_name", ""), data.get("prompt_class", ""))
+    text = await router.call(route, lambda model_url: client.request(data, model_url, route.timeout, use_cache=use_cache, batch=batch, parser=parser))
+    result = clean_response(text)
+    
+    return result
+
+def request_sync(data, use_cache=True, batch=False, parser=None) -> str:
+    # Runs on the shared client loop, so calls from threads pool connections
+    # and share concurrency limits with async callers
+    return client.run_sync(request(data, use_cache=use_cache, batch=batch, parser=parser))
+
+async def stream(data):
+    data["max_length"] = tokenizer.output_budget(data["prompt"], data.get("max_length", max_length))
+    data.setdefault("stop", stop)
+    route: Route = router.get_router().resolve(data.get("prompt_name", ""), data.get("prompt_class", ""))
+    async for text in client.stream(data, route.urls[0], route.timeout):
+        yield text
 
 if __name__ == "__main__":
     test_data = {
@@ -29,7 +47,14 @@ Write a short poem about dolphins.
     
     import asyncio
     print("Sending request to dolphin API...")
-    response = asyncio.run(request(test_data))
+
+    async def run_test():
+        try:
+            return await request(test_data)
+        finally:
+            await client.close()
+
+    response = asyncio.run(run_test())
     
     # Verify the response is a string
     assert isinstance(response, str), f"API response is not a string, got {type(response).__name__} instead"
@@ -0,0 +1,150 @@
+import os
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import MutableSequence
+
+project_root: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+blob_dir: str = os.path.join(project_root, "output", "blobs")
+inline_limit: int = 1024 # externalize keeps strings shorter than this inline
+cache_size: int = 16 # Decoded blobs kept in memory, least recently used dropped first
+
+_lock = threading.Lock()
+_cache: OrderedDict[str, str] = OrderedDict()
+_stored: set[str] = set()
+
+
+def get_path(digest: str) -> str:
+    return os.path.join(blob_dir, digest[:2], digest + ".txt.gz")
+
+
+def is_ref(value) -> bool:
+    return isinstance(value, dict) and set(value) == {"blob", "length"}
+
+
+def put(text: str) -> dict:
+    """
+    Stores text once under its sha256 and returns the reference to keep in
+    its place, e.g. {"blob": "9f86d0...", "length": 4}.
+    """
+    digest: str = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    if digest not in _stored:
+        path: str = get_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path: str = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, "wt", encoding="utf-8") as file:
+                file.write(text)
+            os.replace(temp_path, path)
+        _stored.add(digest)
+
+    remember(digest, text)
+    return {"blob": digest, "length": len(text)}
+
+
+def get(ref: dict) -> str:
+    digest: str = ref["blob"]
+    with _lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    with gzip.open(get_path(digest), "rt", encoding="utf-8") as file:
+        text: str = file.read()
+    remember(digest, text)
+    return text
+
+
+def remember(digest: str, text: str) -> None:
+    with _lock:
+        _cache[digest] = text
+        _cache.move_to_end(digest)
+        while len(_cache) > cache_size:
+            _cache.popitem(last=False)
+
+
+def resolve(value):
+    """
+    The text behind a reference, anything else unchanged.
+    """
+    return get(value) if is_ref(value) else value
+
+
+class BlobList(MutableSequence):
+    """
+    A list of strings that only holds references. Reading an item loads it
+    from the store (recently read ones are cached), writing one stores it,
+    and slicing copies references rather than text.
+    """
+
+    def __init__(self, texts=(), refs: list[dict] | None = None):
+        self.refs: list[dict] = list(refs) if refs is not None else []
+        for text in texts:
+            self.append(text)
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return BlobList(refs=self.refs[index])
+        return get(self.refs[index])
+
+    def __setitem__(self, index, text) -> None:
+        if isinstance(index, slice):
+            self.refs[index] = [ref if is_ref(ref) else put(ref) for ref in text]
+        else:
+            self.refs[index] = text if is_ref(text) else put(text)
+
+    def __delitem__(self, index) -> None:
+        del self.refs[index]
+
+    def insert(self, index: int, text) -> None:
+        self.refs.insert(index, text if is_ref(text) else put(text))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BlobList):
+            return self.refs == other.refs
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return f"BlobList({self.refs!r})"
+
+
+def to_json(value):
+    """
+    json.dumps default hook that writes a BlobList as its references.
+    """
+    if isinstance(value, BlobList):
+        return value.refs
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def externalize(value):
+    """
+    A copy of value with every string of inline_limit characters or more
+    moved to the store and replaced by its reference.
+    """
+    if isinstance(value, str):
+        return put(value) if len(value) >= inline_limit else value
+    if isinstance(value, BlobList):
+        return list(value.refs)
+    if isinstance(value, dict):
+        return {key: externalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [externalize(item) for item in value]
+    return value
+
+
+def restore(data: dict) -> dict:
+    """
+    Turns top level lists of references, as journaled from a BlobList, back
+    into BlobLists. Nothing is loaded until it is read.
+    """
+    for key, value in data.items():
+        if isinstance(value, list) and value and all(is_ref(item) for item in value):
+            data[key] = BlobList(refs=value)
+    return data
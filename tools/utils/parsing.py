@@ -67,4 +67,55 @@ def extract_multi_option_selection(response, options):
             return best_options[0]  # Return the first best match
     
     # If no good matches, return the first option as default
-    return options[0] if options else "No option selected"
\ No newline at end of file
+    return options[0] if options else "No option selected"
+
+def detect_complete_number(text):
+    """
+    Stream hook: returns the leading number once it is followed by a
+    non-numeric character, or None while it may still be growing.
+    """
+    import re
+
+    match = re.match(r'\s*(-?\d+(?:\.\d+)?)(?=[^\d.]|\.[^\d])', text)
+    if match:
+        return match.group(1)
+    return None
+
+def detect_complete_json(text):
+    """
+    Stream hook: returns the first balanced JSON object or list in the text
+    once it is closed and parses, or None while it is still open.
+    """
+    import json
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return None
+    start = min(starts)
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                candidate = text[start:index + 1]
+                try:
+                    json.loads(candidate)
+                    return candidate
+                except ValueError:
+                    return None
+    return None
@@ -1,3 +1,4 @@
+import asyncio
 from tools.web.google_search import google_search, get_content, extract_text_from_html
 from tools.summarization import summarization
 from tools.information_distiller import distill_text
@@ -33,7 +34,8 @@ async def get_web_research(
         actual_num_results = number_of_searches
     
     print(f"  ├─ Executing search with {actual_num_results} results...")
-    results = google_search(query, num_results=actual_num_results)
+    # The search and page fetches block, so they run in threads to let other research proceed
+    results = await asyncio.to_thread(google_search, query, num_results=actual_num_results)
     print(f"  ├─ Search completed with {len(results)} results")
     
     all_text = ""
@@ -46,10 +48,10 @@ async def get_web_research(
         links.append(link)
         print(f"  ├─ [{i+1}/{len(results)}] Retrieving content from: {link[:50]}..." if len(link) > 50 else f"  ├─ [{i+1}/{len(results)}] Retrieving content from: {link}")
         
-        html_content = get_content(link)
+        html_content = await asyncio.to_thread(get_content, link)
         
         if html_content:
-            extracted_text = extract_text_from_html(html_content)
+            extracted_text = await asyncio.to_thread(extract_text_from_html, html_content)
             print(f"  │   ├─ Extracted {len(extracted_text)} characters")
             print(f"  │   ├─ Summarizing content...")
             text_content = await summarization(extracted_text, focus=focus_for_content)
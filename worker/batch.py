@@ -0,0 +1,126 @@
+import copy
+import json
+import time
+import uuid
+import asyncio
+
+from worker.main import run_session, print_stats
+from worker.agent import prompt_router
+from worker.settings import settings
+
+import llm.client as client
+import llm.metrics as metrics
+import llm.limiter as limiter
+
+concurrency: int = 8 # Sessions running at the same time
+llm_concurrency: int = 32 # Upstream LLM requests in flight across all sessions, 0 for no global cap
+
+
+def new_session(entry: dict, index: int) -> dict:
+    """
+    Session data for one input line: the settings with the line's keys on
+    top. content may be given as a single string.
+    """
+    data: dict = copy.deepcopy(settings)
+    data.update(entry)
+    if isinstance(data["content"], str):
+        data["content"] = [data["content"]]
+    data["session"] = {
+        "id": str(entry.get("id", f"{index}-{str(uuid.uuid4()).split('-')[0]}")),
+        "time": str(time.time()).split(".")[0]
+    }
+    return data
+
+
+async def run_one(data: dict, semaphore: asyncio.Semaphore) -> dict:
+    async with semaphore:
+        # Runs in its own task, so the counter only sees this session's requests
+        counter: dict = metrics.count_calls()
+        start: float = time.monotonic()
+        error: str | None = None
+        iterations: int = 0
+        try:
+            iterations = await run_session(data)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"❌ Session {data['session']['id']} failed: {error}")
+
+        return {
+            "id": data["session"]["id"],
+            "claim": data.get("claim"),
+            "content": data["content"][-1] if data.get("content") else "",
+            "test": data.get("test"),
+            "iterations": iterations,
+            "calls": counter["calls"],
+            "seconds": round(time.monotonic() - start, 2),
+            "error": error or data.get("error")
+        }
+
+
+async def main(input_path: str, output_path: str, session_concurrency: int = concurrency, llm_limit: int = llm_concurrency) -> dict:
+    """
+    Runs every session in the JSONL file at input_path in one event loop and
+    appends one JSON result per line to output_path as sessions finish.
+    """
+    with open(input_path, "r", encoding="utf-8") as file:
+        entries: list[dict] = [json.loads(line) for line in file if line.strip()]
+
+    print(f"\n{'='*50}")
+    print(f"📦 STARTING BATCH - {len(entries)} sessions, {session_concurrency} at a time, {llm_limit or 'no'} LLM requests cap")
+    print(f"{'='*50}")
+
+    limiter.global_limit = llm_limit
+    finished: int = 0
+    failed: int = 0
+    calls: int = 0
+    try:
+        print(f"🔌 Warming up LLM connections...")
+        await client.warm_up(prompt_router.urls())
+
+        semaphore = asyncio.Semaphore(session_concurrency)
+        start: float = time.monotonic()
+        tasks: list[asyncio.Task] = [
+            asyncio.ensure_future(run_one(new_session(entry, index), semaphore)) for index, entry in enumerate(entries)
+        ]
+
+        with open(output_path, "a", encoding="utf-8") as output:
+            for next_result in asyncio.as_completed(tasks):
+                result: dict = await next_result
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+                finished += 1
+                failed += result["error"] is not None
+                calls += result["calls"]
+                print(f"📦 [{finished}/{len(entries)}] Session {result['id']} done in {result['seconds']}s with {result['calls']} LLM calls")
+
+        elapsed: float = time.monotonic() - start
+    finally:
+        await client.close()
+
+    report: dict = {
+        "sessions": finished,
+        "failed": failed,
+        "seconds": round(elapsed, 2),
+        "sessions_per_minute": round(finished / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "calls_per_session": round(calls / finished, 2) if finished else 0.0
+    }
+
+    print_stats()
+    print(f"\n{'='*50}")
+    print(f"🏁 BATCH COMPLETED - {finished} sessions ({failed} failed) in {report['seconds']}s")
+    print(f"📈 {report['sessions_per_minute']} sessions/min, {report['calls_per_session']} LLM calls/session")
+    print(f"{'='*50}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run many worker sessions from a JSONL file")
+    parser.add_argument("input", help="JSONL file, one session per line, e.g. {\"claim\": \"...\", \"content\": \"...\"}")
+    parser.add_argument("output", help="JSONL file the results are appended to")
+    parser.add_argument("--concurrency", type=int, default=concurrency, help="Sessions running at the same time")
+    parser.add_argument("--llm-concurrency", type=int, default=llm_concurrency, help="LLM requests in flight across all sessions, 0 for no cap")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.input, args.output, args.concurrency, args.llm_concurrency))
@@ -0,0 +1,185 @@
+import json
+import time
+import asyncio
+from collections import OrderedDict
+
+from aiohttp import web
+
+import worker.batch as batch
+import worker.agent as worker_agent
+import aigent.main as aigent_main
+import aigent.agent as aigent_agent
+
+import llm.client as client
+import llm.limiter as limiter
+from tools.utils import blob_store
+
+host: str = "127.0.0.1" # Only local clients, the daemon has no authentication
+port: int = 8765
+socket_path: str = "" # Serve on this Unix socket instead of TCP when set
+session_concurrency: int = 8 # Sessions running at the same time, later ones wait
+llm_concurrency: int = 32 # Upstream LLM requests in flight across all sessions, 0 for no global cap
+keep_results: int = 1000 # Finished sessions kept for GET, the oldest are dropped first
+max_wait: float = 300.0 # Longest a GET with ?wait= blocks for a running session
+
+
+class SessionStore:
+    """
+    Sessions accepted by the daemon, running or finished, by id.
+    """
+
+    def __init__(self):
+        self.sessions: OrderedDict[str, dict] = OrderedDict()
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.semaphore = asyncio.Semaphore(session_concurrency)
+
+    def start(self, agent: str, entry: dict) -> dict:
+        if agent == "worker":
+            data: dict = batch.new_session(entry, len(self.sessions))
+            session_id: str = data["session"]["id"]
+            run = batch.run_one(data, self.semaphore)
+        else:
+            data = aigent_main.initialize_data(entry)
+            session_id = data["session"]["id"]
+            run = self.run_aigent(data)
+
+        if session_id in self.sessions:
+            # Reusing an id would hide the earlier session and its result
+            run.close()
+            raise ValueError(f"Session {session_id} already exists")
+        session: dict = {"id": session_id, "agent": agent, "status": "queued", "submitted": time.time(), "result": None}
+        self.sessions[session_id] = session
+        self.tasks[session_id] = asyncio.ensure_future(self.track(session, run))
+        self.drop_old()
+        return session
+
+    async def track(self, session: dict, run) -> None:
+        session["status"] = "running"
+        try:
+            session["result"] = await run
+            session["status"] = "failed" if session["result"].get("error") else "done"
+        except Exception as e:
+            session["result"] = {"error": f"{type(e).__name__}: {e}"}
+            session["status"] = "failed"
+        finally:
+            session["finished"] = time.time()
+            if self.tasks.get(session["id"]) is asyncio.current_task():
+                del self.tasks[session["id"]]
+
+    async def run_aigent(self, data: dict) -> dict:
+        async with self.semaphore:
+            return await aigent_main.run_session(data)
+
+    def drop_old(self) -> None:
+        finished: list[str] = [session_id for session_id in self.sessions if session_id not in self.tasks]
+        for session_id in finished[:max(0, len(self.sessions) - keep_results)]:
+            del self.sessions[session_id]
+
+
+async def create_session(request: web.Request) -> web.Response:
+    try:
+        entry: dict = await request.json()
+    except ValueError:
+        return web.json_response({"error": "Body must be a JSON object"}, status=400)
+    if not isinstance(entry, dict):
+        return web.json_response({"error": "Body must be a JSON object"}, status=400)
+
+    agent: str = entry.pop("agent", "worker")
+    if agent not in ("worker", "aigent"):
+        return web.json_response({"error": f"Unknown agent {agent}, use worker or aigent"}, status=400)
+    required: list[str] = ["claim", "content"] if agent == "worker" else ["intention", "content"]
+    if any(key not in entry for key in required):
+        return web.json_response({"error": f"The {agent} session needs {' and '.join(required)}"}, status=400)
+
+    store: SessionStore = request.app["store"]
+    try:
+        session: dict = store.start(agent, entry)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=409)
+    print(f"📥 Accepted {agent} session {session['id']}")
+    return web.json_response({"id": session["id"], "status": session["status"], "url": f"/sessions/{session['id']}"}, status=202)
+
+
+async def get_session(request: web.Request) -> web.Response:
+    """
+    The session's status and, once finished, its result. ?wait=<seconds>
+    holds the response until the session finishes or the time is up.
+    """
+    store: SessionStore = request.app["store"]
+    session_id: str = request.match_info["session_id"]
+    if session_id not in store.sessions:
+        return web.json_response({"error": f"No session {session_id}"}, status=404)
+
+    try:
+        wait: float = min(float(request.query.get("wait", 0) or 0), max_wait)
+    except ValueError:
+        return web.json_response({"error": "wait must be a number of seconds"}, status=400)
+    task: asyncio.Task | None = store.tasks.get(session_id)
+    if wait > 0 and task is not None:
+        await asyncio.wait([task], timeout=wait)
+
+    return web.json_response(store.sessions[session_id], dumps=dumps)
+
+
+async def get_status(request: web.Request) -> web.Response:
+    store: SessionStore = request.app["store"]
+    counts: dict[str, int] = {}
+    for session in store.sessions.values():
+        counts[session["status"]] = counts.get(session["status"], 0) + 1
+    return web.json_response({
+        "sessions": counts,
+        "uptime": round(time.time() - request.app["started"], 1),
+        "llm": limiter.snapshot()
+    })
+
+
+def dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=blob_store.to_json)
+
+
+async def on_startup(app: web.Application) -> None:
+    # Everything a session would otherwise pay for at process start
+    print(f"🔥 Loading prompts and warming up LLM connections...")
+    worker_agent.registry.load()
+    aigent_agent.registry.load()
+    limiter.global_limit = llm_concurrency
+    await client.warm_up(worker_agent.prompt_router.urls() + aigent_agent.prompt_router.urls())
+    app["store"] = SessionStore()
+    app["started"] = time.time()
+
+
+async def on_cleanup(app: web.Application) -> None:
+    for task in list(app["store"].tasks.values()):
+        task.cancel()
+    await client.close()
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_post("/sessions", create_session)
+    app.router.add_get("/sessions/{session_id}", get_session)
+    app.router.add_get("/status", get_status)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Keep the worker and aigent warm and run sessions sent over a local socket")
+    parser.add_argument("--port", type=int, default=port, help="Local TCP port")
+    parser.add_argument("--socket", default=socket_path, help="Unix socket path, used instead of TCP")
+    parser.add_argument("--concurrency", type=int, default=session_concurrency, help="Sessions running at the same time")
+    parser.add_argument("--llm-concurrency", type=int, default=llm_concurrency, help="LLM requests in flight across all sessions, 0 for no cap")
+    args = parser.parse_args()
+
+    session_concurrency = args.concurrency
+    llm_concurrency = args.llm_concurrency
+
+    if args.socket:
+        print(f"🛰️ Worker daemon listening on {args.socket}")
+        web.run_app(create_app(), path=args.socket, print=None)
+    else:
+        print(f"🛰️ Worker daemon listening on http://{host}:{args.port}")
+        web.run_app(create_app(), host=host, port=args.port, print=None)
@@ -1,64 +1,212 @@
-from worker.test import main as test_action
+import copy
+import asyncio
+from typing import Callable
+
+from worker.test import main as test_action, fail_likelihood
 from worker.plan import main as plan_action
 from worker.work import main as work_action
 
-from worker.tools.file_handler import save_data
+from worker.tools.file_handler import save_data, close_data, load_data
+from worker.agent import prompt_router
+
+import llm.client as client
+import llm.cache as cache
+import llm.metrics as metrics
+import llm.limiter as limiter
+import llm.balancer as balancer
+import worker.tools.memo as memo
+
+from tools.utils import blob_store
+from tools.utils.blob_store import BlobList
+
+
+# Fields planning reads or writes, copied so a discarded plan leaves the session untouched
+plan_fields: list[str] = ["tasks", "tools", "memo", "action", "error"]
+
+
+def speculative_planner(data: dict, speculation: dict) -> Callable[[list[float], bool], None]:
+    """
+    on_partial callback for the test action. Once the scores so far make
+    failing likely enough, and the test still has rounds to go, it starts
+    planning on a copy of data, keeping the task and the copy in speculation.
+    """
+    def on_partial(responses: list[float], final: bool) -> None:
+        if final or "task" in speculation or "pass_value" not in data:
+            return
+        likelihood: float = fail_likelihood(responses, data["pass_value"])
+        if likelihood < data.get("speculation_confidence", 0.8):
+            return
+
+        print(f"🔮 Test fails with {likelihood:.0%} likelihood so far, planning while it finishes...")
+        plan_data: dict = dict(data)
+        plan_data["content"] = data["content"][:]
+        for key in plan_fields:
+            if key in data:
+                plan_data[key] = copy.deepcopy(data[key])
+        speculation["data"] = plan_data
+        speculation["task"] = asyncio.ensure_future(plan_action(plan_data))
+
+    return on_partial
+
+
+async def adopt_plan(data: dict, speculation: dict) -> bool:
+    """
+    Waits for the speculative plan and copies its result into data. Returns
+    False when it failed, so the caller plans the usual way.
+    """
+    try:
+        await speculation["task"]
+    except Exception as e:
+        print(f"⚠️ Speculative planning failed: {e}")
+        return False
+    finally:
+        plan_data: dict = speculation.pop("data")
+        speculation.clear()
+
+    for key in ["tasks", "action", "error"]:
+        if key in plan_data:
+            data[key] = plan_data[key]
+    return True
+
+
+def cancel_speculation(speculation: dict) -> None:
+    if "task" in speculation:
+        print(f"🔮 Discarding speculative plan")
+        speculation["task"].cancel()
+    speculation.clear()
 
 
 async def main(data: dict = {}) -> None:
+    try:
+        print(f"🔌 Warming up LLM connections...")
+        await client.warm_up(prompt_router.urls())
+
+        i: int = await run_session(data)
+    finally:
+        # Also on errors and Ctrl+C, so the connections are not left open
+        await client.close()
+    print_stats()
+    print(f"\n{'='*50}")
+    print(f"🏁 AGENT PROGRAM COMPLETED - Processed {i} iterations")
+    print(f"{'='*50}")
+
+
+async def run_session(data: dict) -> int:
+    """
+    Runs one session to completion on connections that are already set up,
+    saving it as it goes. Returns the number of iterations processed.
+
+    A session whose journal says it finished is not run again; its stored
+    result is kept as it is.
+    """
+    if data.get("finished"):
+        print(f"🏁 Session {data['session']['id']} already finished after {data.get('iteration', 0)} iterations, nothing to resume")
+        return data.get("iteration", 0)
+
     if "action" not in data:
         data["action"] = "test"
 
+    # Every content version is kept, so they live in the blob store and the
+    # session only holds references
+    if not isinstance(data["content"], BlobList):
+        data["content"] = BlobList(data["content"])
+
     print(f"\n{'='*50}")
     print(f"📋 STARTING AGENT PROGRAM - {data.get('claim', 'No claim specified')}")
     print(f"🔄 Initial action: {data['action']}")
     print(f"{'='*50}")
 
-    i = 0
-    while data["action"] != "exit" and i < data["iterations"]:
-        print(f"\n{'*'*40}")
-        print(f"🔄 ITERATION {i+1}/{data['iterations']} - Action: {data['action'].upper()}")
-        print(f"{'*'*40}")
-
-        if data["action"] == "test":
-            await test_action(data)
-            print(f"✅ Test action completed. Value: {data.get('test', {}).get('value', 'N/A')}")
-
-        elif data["action"] == "work":
-            print(f"🛠️ Starting work action...")
-            await work_action(data)
-            print(f"✅ Work action completed")
-            break
-
-        elif "pass_value" in data and "test" in data and "value" in data["test"] and data["test"]["value"] < data["pass_value"]:
-            print(f"📝 Content value ({data['test']['value']}) below pass threshold ({data['pass_value']})")
-            print(f"🧠 Planning improvements...")
-            await plan_action(data)
-            print(f"✅ Plan action completed")
-
-        else:
-            print(f"🎉 Content value ({data.get('test', {}).get('value', 'N/A')}) meets or exceeds pass threshold ({data.get('pass_value', 'N/A')})")
-            print(f"✅ Operation complete.")
-            break
+    # With speculative_planning the plan for a failing test starts before
+    # the test has taken all its samples
+    speculation: dict = {}
+
+    # A resumed session continues from the iteration it was in
+    i = data.get("iteration", 0)
+    try:
+        while data["action"] != "exit" and i < data["iterations"]:
+            print(f"\n{'*'*40}")
+            print(f"🔄 ITERATION {i+1}/{data['iterations']} - Action: {data['action'].upper()}")
+            print(f"{'*'*40}")
+
+            if data["action"] == "test":
+                cancel_speculation(speculation)
+                on_partial = speculative_planner(data, speculation) if data.get("speculative_planning") else None
+                await test_action(data, on_partial=on_partial)
+                print(f"✅ Test action completed. Value: {data.get('test', {}).get('value', 'N/A')}")
+                if "pass_value" in data and data.get("test", {}).get("value", 0) >= data["pass_value"]:
+                    cancel_speculation(speculation)
+
+            elif data["action"] == "work":
+                print(f"🛠️ Starting work action...")
+                await work_action(data)
+                print(f"✅ Work action completed")
+                break
+
+            elif "error" in data.get("test", {}):
+                data["error"] = data["test"]["error"]
+                print(f"❌ Cannot plan improvements, the test failed: {data['error']}")
+                break
+
+            elif "pass_value" in data and "test" in data and "value" in data["test"] and data["test"]["value"] < data["pass_value"]:
+                print(f"📝 Content value ({data['test']['value']}) below pass threshold ({data['pass_value']})")
+                if "task" in speculation and await adopt_plan(data, speculation):
+                    print(f"🔮 Using the plan started during the test")
+                else:
+                    print(f"🧠 Planning improvements...")
+                    await plan_action(data)
+                print(f"✅ Plan action completed")
+
+            else:
+                print(f"🎉 Content value ({data.get('test', {}).get('value', 'N/A')}) meets or exceeds pass threshold ({data.get('pass_value', 'N/A')})")
+                print(f"✅ Operation complete.")
+                break
 
+            i += 1
+            data["iteration"] = i
+            await save_data(data)
+            print(f"💾 Progress saved after iteration {i}")
+
+        # Journaled with the final save, so a resume does not run the session again
+        data["iteration"] = i
+        data["finished"] = True
+    finally:
+        cancel_speculation(speculation)
         await save_data(data)
-        i += 1
-        print(f"💾 Progress saved after iteration {i}")
+        await close_data(data)
+
+    return i
+
+
+def print_stats() -> None:
+    print(f"📊 LLM cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses")
+    print(f"📊 Stage memo: {memo.stats['hits']} hits, {memo.stats['misses']} misses, {memo.stats['stores']} stored")
+    for model_url, state in limiter.snapshot().items():
+        print(f"📊 LLM concurrency for {model_url.split('/')[-1]}: limit {state['limit']}, queue depth {state['queue_depth']}")
+    for pool_name, replicas in balancer.snapshot().items():
+        ejected = [replica for replica, state in replicas.items() if state["ejected"]]
+        print(f"📊 LLM replicas for {pool_name.split('/')[-1]}: {len(replicas)} replicas, {len(ejected)} ejected")
+    for prompt_name, entry in metrics.snapshot().items():
+        print(f"📊 LLM output for {prompt_name or 'unnamed'}: {entry['calls']} calls, {entry['output_tokens']}/{entry['budget_tokens']} tokens of budget, {entry['stopped']} stopped, {entry['budget_exhausted']} hit the budget")
 
-    await save_data(data)
-    print(f"\n{'='*50}")
-    print(f"🏁 AGENT PROGRAM COMPLETED - Processed {i} iterations")
-    print(f"{'='*50}")
-        
 
 if __name__ == "__main__":
     import asyncio
     import json
+    import argparse
     from worker.settings import settings
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", help="Session journal path or \"<time>_<id>\" name to continue after a crash")
+    args = parser.parse_args()
+
+    if args.resume:
+        settings = load_data(args.resume)
+        if not settings.get("finished"):
+            print(f"♻️ Resuming session {args.resume} at iteration {settings.get('iteration', 0) + 1}, action {settings.get('action')}")
+
     asyncio.run(main(settings))
 
-    print(json.dumps(settings, indent=4))
+    print(json.dumps(settings, indent=4, default=blob_store.to_json))
 
     # Display content progress in a more visual way
     print("\n💼 CONTENT PROGRESS 💼")
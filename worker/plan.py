@@ -1,6 +1,8 @@
 import json
 from worker.agent import run_agent
+from tools.utils.parsing import detect_complete_json
 from worker.tools.choose_tools import main as choose_tools
+import worker.tools.memo as memo
 
 
 async def main(data: dict = {}) -> None:
@@ -19,13 +21,28 @@ async def main(data: dict = {}) -> None:
     How can the content be improved to meet the claim?
     """
 
+    # Tasks and their tools for the same content, claim and tool list are
+    # reused as a whole, skipping generation and its retries
+    memo_key: str = memo.make_key("plan", ["plan", "choose_tools_batch", "choose_tools"], {
+        "content": data["content"][-1],
+        "claim": data["claim"],
+        "tools": data.get("tools")
+    })
+    cached: list | None = memo.get(data, "plan", memo_key)
+    if cached is not None:
+        data["tasks"] = cached
+        data["action"] = "work"
+        print(f"✅ Reusing {len(cached)} planned tasks")
+        print(f"🔄 Setting next action to: WORK")
+        return
+
     print(f"🧠 Generating improvement tasks...")
     
     i = 0
     while i < data["iterations"]:
         try:
             print(f"  ├─ Attempt {i+1}/{data['iterations']} to generate tasks")
-            task_list: dict = json.loads(await run_agent("plan", user_prompt))
+            task_list: dict = json.loads(await run_agent("plan", user_prompt, refresh=i > 0, parser=detect_complete_json))
             tasks: list = task_list["tasks"]
             data["tasks"] = tasks
             print(f"  ✅ Successfully generated {len(tasks)} tasks")
@@ -39,6 +56,8 @@ async def main(data: dict = {}) -> None:
         print(f"🔧 Assigning tools to {len(data['tasks'])} tasks...")
         await choose_tools(data)
         print(f"✅ Tools assigned successfully")
+        if data["tasks"]:
+            memo.put(data, "plan", memo_key, [{"task": task["task"], "tools": task["tools"]} for task in data["tasks"]])
     else:
         error_msg = "Failed to generate tasks after multiple attempts."
         data["error"] = error_msg
@@ -24,8 +24,13 @@ Make sure to:
 
 assistant_start: str = """"""
 
+max_length: int = 128 # Output tokens, the answer is a short list of tool names
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
\ No newline at end of file
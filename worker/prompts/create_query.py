@@ -27,8 +27,13 @@ Do not include any additional text, explanations, or reasoning.
 
 assistant_start: str = """"""
 
+max_length: int = 64 # Output tokens, the answer is a single search query
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
\ No newline at end of file
@@ -23,8 +23,13 @@ IMPORTANT: The improved content should generally be equal to or longer than the
 
 assistant_start: str = """"""
 
+max_length: int = 4096 # Output tokens, the answer is the whole improved content
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
\ No newline at end of file
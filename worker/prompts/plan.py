@@ -29,8 +29,13 @@ assistant_start: str = """
 {
   "tasks": ["""
 
+max_length: int = 512 # Output tokens, the answer is at most 3 tasks
+stop: list[str] = ["<|im-end|>"]
+
 prompt_dict: dict = {
     "system": system,
     "user": "",
-    "assistant": assistant_start
+    "assistant": assistant_start,
+    "max_length": max_length,
+    "stop": stop
 }
\ No newline at end of file
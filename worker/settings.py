@@ -8,12 +8,32 @@ settings: dict = {
     "content": [content],
     "iterations": 3, # It seems that 3 iteration is a minimum for the agent to work properly (unclear why)
     "pass_value": 0.85, # Threshold for content quality
+    "test_samples": None, # Most score samples per test, None uses iterations; fewer are taken once the result is clearly above or below pass_value
+    "min_samples": 3, # Samples in the first round and before the test may stop early, later rounds take as many as the backend allows
+    "research_concurrency": 3, # Tasks whose query and web research run at the same time
+    "speculative_planning": False, # Start planning while the test is still sampling once it is likely to fail
+    "speculation_confidence": 0.8, # Likelihood of the test failing at which speculative planning starts
+    "merge_improvements": False, # Improve the content for several tasks in one generation
+    "merge_tokens": 6000, # Most tokens of tasks and new data merged into one improvement
+    "beam_width": 1, # Candidate improvements generated and scored per improvement, 1 keeps the first one, more costs a generation and a score per extra candidate
+    "beam_samples": 2, # Test samples scoring each candidate
+    "memo": { # Per stage: reuse an earlier result for the same inputs, refresh it, or off
+        "test": "reuse",
+        "plan": "reuse",
+        "create_query": "reuse"
+    },
     "session": {
         "id": str(uuid.uuid4()).split("-")[0],
         "time": str(time.time()).split(".")[0],
     },
     "agent": {
         "llm_url": "https://www.northbeach.fi/dolphin", # developer private llm. replace with your own if you have one
+        "routes": { # Backends tried in order per prompt class, with a timeout per attempt
+            "generation": {"urls": ["https://www.northbeach.fi/dolphin"], "timeout": 300},
+            "scoring": {"urls": ["https://www.northbeach.fi/dolphin"], "timeout": 60} # put a small local model first for the score prompts
+        },
+        "prompt_routes": {}, # Prompt name -> route name, overrides the prompt's own class
+        "replicas": {}, # Endpoint URL -> replica URLs the requests to it are balanced over
         "global_system_start_prompt": "",
         "global_system_end_prompt": ""
     },
@@ -1,23 +1,53 @@
-from worker.agent import run_agent
+import math
+from typing import Callable
 
+from worker.agent import run_agent_n, sample_width
+from tools.utils.parsing import detect_complete_number
+import worker.tools.memo as memo
 
-async def main(data: dict) -> None:
+score_granularity: float = 0.1 # Smallest step between the scores the test prompt gives, the least spread assumed between samples
+stop_samples: int = 3 # Fewest samples that can stop a test early, two have a margin of 0.9 at the least spread
 
+# Two-sided 95% critical values of Student's t for 1-30 degrees of freedom
+t_critical: list[float] = [
+    12.71, 4.30, 3.18, 2.78, 2.57, 2.45, 2.36, 2.31, 2.26, 2.23,
+    2.20, 2.18, 2.16, 2.14, 2.13, 2.12, 2.11, 2.10, 2.09, 2.09,
+    2.08, 2.07, 2.07, 2.06, 2.06, 2.06, 2.05, 2.05, 2.05, 2.04
+]
+
+
+def confidence_interval(values: list[float]) -> tuple[float, float]:
     """
-    Keys needed in dictionary:
-    - claim: str
-    - content: str
-    - iterations: int
+    95% confidence interval for the mean of the samples. The spread is taken
+    to be at least score_granularity, so a few identical scores, which say
+    little about the real variance, do not give a zero-width interval.
     """
+    if len(values) < 2:
+        return float("-inf"), float("inf")
+    mean: float = sum(values) / len(values)
+    sample_std: float = max(score_granularity, (sum((x - mean) ** 2 for x in values) / (len(values) - 1)) ** 0.5)
+    t: float = t_critical[len(values) - 2] if len(values) - 2 < len(t_critical) else 1.96
+    margin: float = t * sample_std / len(values) ** 0.5
+    return mean - margin, mean + margin
 
-    print(f"\n==== STARTING TEST MODULE ====")
-    print(f"Testing claim: '{data['claim']}'")
-    print(f"Content length: {len(data['content'][-1])} characters")
-    print(f"Iterations: {data['iterations']}")
 
-    user_prompt: str = f"""
+def fail_likelihood(values: list[float], pass_value: float) -> float:
+    """
+    Rough likelihood that the mean score is below pass_value, from a normal
+    approximation with the same spread floor as confidence_interval.
+    """
+    if len(values) < 2:
+        return 0.0
+    mean: float = sum(values) / len(values)
+    sample_std: float = max(score_granularity, (sum((x - mean) ** 2 for x in values) / (len(values) - 1)) ** 0.5)
+    z: float = (pass_value - mean) / (sample_std / len(values) ** 0.5)
+    return 0.5 * (1 + math.erf(z / 2 ** 0.5))
+
+
+def create_prompt(data: dict, content: str) -> str:
+    return f"""
 CONTENT:
-{data["content"][-1]}
+{content}
 
 CLAIM:
 This content is {data["claim"]}
@@ -25,19 +55,110 @@ This content is {data["claim"]}
 How well does the claim describe the content?
     """
 
-    responses = []
 
-    i: int = 0
-    while i < data["iterations"]:
+async def score_content(data: dict, content: str, samples: int = 2) -> float | None:
+    """
+    Mean test score of content over samples drawn in one request, None when
+    no sample could be read as a score.
+    """
+    scores: list[float] = []
+    for sample in await run_agent_n("test", create_prompt(data, content), samples, parser=detect_complete_number, hedge=True):
         try:
-            print(f"  ├─ Running test iteration {i+1}/{data['iterations']}...")
-            response: float = float(await run_agent("test", user_prompt))
-            responses.append(response)
-            print(f"  ├─ Test iteration {i+1} result: {response:.2f}")
-            i += 1
-        except Exception as e:
-            print(f"  ├─ ⚠️ Test iteration failed: {e}")
-            continue
+            scores.append(float(sample))
+        except ValueError:
+            pass
+    return sum(scores) / len(scores) if scores else None
+
+
+async def main(data: dict, on_partial: Callable[[list[float], bool], None] | None = None) -> None:
+
+    """
+    Keys needed in dictionary:
+    - claim: str
+    - content: str
+    - iterations: int
+
+    Optional keys:
+    - pass_value: float, enables stopping early once the result is clear
+    - test_samples: int, sample budget, defaults to iterations
+    - min_samples: int, samples in the first round and before any early stop
+
+    on_partial is called with the scores so far after every round, and
+    whether that round is the test's last.
+    """
+
+    print(f"\n==== STARTING TEST MODULE ====")
+    print(f"Testing claim: '{data['claim']}'")
+    print(f"Content length: {len(data['content'][-1])} characters")
+    budget: int = data.get("test_samples") or data["iterations"]
+    min_samples: int = max(1, min(data.get("min_samples", stop_samples), budget))
+    pass_value: float | None = data.get("pass_value")
+    print(f"Iterations: {budget}")
+
+    # The same content, claim and sampling settings were scored before
+    memo_key: str = memo.make_key("test", ["test"], {
+        "content": data["content"][-1],
+        "claim": data["claim"],
+        "test_samples": budget,
+        "min_samples": min_samples,
+        "pass_value": pass_value
+    })
+    cached: dict | None = memo.get(data, "test", memo_key)
+    if cached is not None:
+        data["test"] = cached
+        data["action"] = ""
+        print(f"  └─ Mean: {cached['stats']['mean']:.2f} from {cached['samples_needed']} earlier samples")
+        print(f"\n==== TEST MODULE COMPLETED ====")
+        return
+
+    user_prompt: str = create_prompt(data, data["content"][-1])
+
+    responses = []
+    interval: tuple[float, float] = (float("-inf"), float("inf"))
+    stopped_early: bool = False
+
+    # Samples are taken in rounds, each round one multi-sample request, until
+    # the budget is spent or the confidence interval of the mean lies entirely
+    # on one side of pass_value. Rounds are as wide as the backend currently
+    # allows, and the first one at least large enough to allow an early stop.
+    first_round: int = max(min_samples, stop_samples)
+    while len(responses) < budget:
+        width: int = max(sample_width("test"), first_round if not responses else 1)
+        count: int = min(width, budget - len(responses))
+        print(f"  ├─ Running test iterations {len(responses)+1}-{len(responses)+count}/{budget}...")
+        samples: list[str] = await run_agent_n("test", user_prompt, count, parser=detect_complete_number, hedge=True)
+        if not samples:
+            print(f"  ├─ ❌ No samples received, stopping with {len(responses)} results")
+            break
+        for sample in samples:
+            try:
+                response: float = float(sample)
+                responses.append(response)
+                print(f"  ├─ Test iteration {len(responses)} result: {response:.2f}")
+            except Exception as e:
+                print(f"  ├─ ⚠️ Test iteration failed: {e}")
+
+        if pass_value is not None and min_samples <= len(responses) < budget:
+            interval = confidence_interval(responses)
+            if interval[1] < pass_value or interval[0] >= pass_value:
+                stopped_early = True
+                side: str = "above" if interval[0] >= pass_value else "below"
+                print(f"  ├─ Mean is clearly {side} {pass_value} (95% CI {interval[0]:.2f}-{interval[1]:.2f}), stopping after {len(responses)}/{budget} samples")
+
+        if on_partial is not None:
+            on_partial(responses, stopped_early or len(responses) >= budget)
+        if stopped_early:
+            break
+
+    if not responses:
+        # Nothing to score with, e.g. the endpoint is down; no value is set so
+        # the session does not continue as if the content had been judged
+        error: str = "No test samples could be collected"
+        data["test"] = {"responses": [], "error": error}
+        print(f"  └─ ❌ {error}")
+        data["action"] = ""
+        print(f"\n==== TEST MODULE COMPLETED ====")
+        return
 
     stats: dict = {
         "mean": sum(responses) / len(responses),
@@ -46,11 +167,16 @@ How well does the claim describe the content?
         "std": (sum((x - (sum(responses) / len(responses))) ** 2 for x in responses) / len(responses)) ** 0.5
     }
 
+    interval = confidence_interval(responses)
     data["test"] = {
         "responses": responses,
         "stats": stats,
-        "value": stats["mean"]
+        "value": stats["mean"],
+        "samples_needed": len(responses),
+        "stopped_early": stopped_early,
+        "interval": [interval[0], interval[1]] if len(responses) > 1 else None
     }
+    memo.put(data, "test", memo_key, data["test"])
 
     print(f"  ├─ Test complete. Results:")
     print(f"  ├─ Mean: {stats['mean']:.2f}")
@@ -1,5 +1,7 @@
 import json
+import asyncio
 from worker.agent import run_agent
+from tools.utils.parsing import detect_complete_json
 
 async def main(data: dict) -> None:
     """
@@ -8,10 +10,63 @@ async def main(data: dict) -> None:
     - tools: list of tools
     """
 
-    tasks_with_tools: list = []
+    # One request picks tools for every task, only tasks whose entry is
+    # missing or malformed get a request of their own
+    chosen: dict[int, list] = await choose_for_tasks(data)
 
-    for task in data["tasks"]:
-        user_prompt: str = f"""
+    missing: list[int] = [index for index in range(len(data["tasks"])) if index not in chosen]
+    if missing:
+        print(f"Choosing tools separately for {len(missing)} tasks")
+        results: list = await asyncio.gather(*[choose_for_task(data, data["tasks"][index]) for index in missing])
+        for index, tools_list in zip(missing, results):
+            if tools_list is not None:
+                chosen[index] = tools_list
+
+    data["tasks"] = [
+        {
+            "task": task,
+            "tools": chosen[index]
+        }
+        for index, task in enumerate(data["tasks"]) if index in chosen
+    ]
+
+
+async def choose_for_tasks(data: dict) -> dict[int, list]:
+    tasks: str = "\n".join(f"{index}. {task}" for index, task in enumerate(data["tasks"], start=1))
+    user_prompt: str = f"""
+        TASKS:
+        {tasks}
+
+        TOOLS:
+        {data["tools"]}
+
+        What tools can help in improving each task?
+        """
+
+    i: int = 0
+    while i < data["iterations"]:
+        try:
+            response: dict = json.loads(await run_agent("choose_tools_batch", user_prompt, refresh=i > 0, parser=detect_complete_json))
+            chosen: dict[int, list] = {}
+            for key, tools_list in response.items():
+                try:
+                    index: int = int(key) - 1
+                except (TypeError, ValueError):
+                    # A key that is not a task number, the other entries still count
+                    continue
+                if 0 <= index < len(data["tasks"]) and isinstance(tools_list, list) and all(isinstance(tool, str) for tool in tools_list):
+                    chosen[index] = tools_list
+            return chosen
+        except Exception as e:
+            print(f"Batched attempt {i + 1} failed: {e}")
+            i += 1
+            continue
+
+    return {}
+
+
+async def choose_for_task(data: dict, task: str) -> list | None:
+    user_prompt: str = f"""
         TASK:
         {task}
 
@@ -21,22 +76,18 @@ async def main(data: dict) -> None:
         What tools can help in improving the task?
         """
 
-        i: int = 0
-        while i < data["iterations"]:
-            try:
-                tools: str = await run_agent("choose_tools", user_prompt)
-                tools_list: list = json.loads(tools)
-                tasks_with_tools.append({
-                    "task": task,
-                    "tools": tools_list
-                })
-                break
-            except Exception as e:
-                print(f"Attempt {i + 1} failed: {e}")
-                i += 1
-                continue
-
-    data["tasks"] = tasks_with_tools
+    i: int = 0
+    while i < data["iterations"]:
+        try:
+            tools: str = await run_agent("choose_tools", user_prompt, refresh=i > 0, parser=detect_complete_json)
+            tools_list: list = json.loads(tools)
+            return tools_list
+        except Exception as e:
+            print(f"Attempt {i + 1} failed: {e}")
+            i += 1
+            continue
+
+    return None
 
 
 if __name__ == "__main__":
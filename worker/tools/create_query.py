@@ -1,5 +1,6 @@
 import json
 from worker.agent import run_agent
+import worker.tools.memo as memo
 
 async def main(data: dict = {}, task: str = "") -> str:
     """
@@ -29,11 +30,21 @@ TASK:
 What Google search query would find FACTUAL INFORMATION needed to accomplish the TASK and transform the CONTENT to match the CLAIM?
 """
 
+    memo_key: str = memo.make_key("create_query", ["create_query"], {
+        "content": data["content"][-1],
+        "claim": data["claim"],
+        "task": task
+    })
+    cached: str | None = memo.get(data, "create_query", memo_key)
+    if cached is not None:
+        print(f"Query reused: {cached}")
+        return cached
+
     query: str = ""
     i: int = 0
     while i < data["iterations"]:
         try:
-            query: str = await run_agent("create_query", user_prompt)
+            query: str = await run_agent("create_query", user_prompt, refresh=i > 0)
             break
         except Exception as e:
             print(f"Attempt {i + 1} failed: {e}")
@@ -41,6 +52,8 @@ What Google search query would find FACTUAL INFORMATION needed to accomplish the
             continue
 
     print(f"Query created: {query}")
+    if query:
+        memo.put(data, "create_query", memo_key, query)
 
     return query
 
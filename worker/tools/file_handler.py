@@ -1,21 +1,54 @@
+import os
+import time
+
+from worker.tools.journal import Journal
+from tools.utils import blob_store
+
+output_dir: str = "output/sessions/"
+
+_journals: dict[str, Journal] = {}
+
+
+def get_session_path(data: dict) -> str:
+    if "session" not in data or "time" not in data["session"] or "id" not in data["session"]:
+        data["session"] = {"id": "session", "time": str(int(time.time()))}
+    return os.path.join(output_dir, data["session"]["time"] + "_" + data["session"]["id"] + ".jsonl.gz")
+
+
+def get_journal(path: str) -> Journal:
+    path = os.path.abspath(path)
+    if path not in _journals:
+        _journals[path] = Journal(path)
+    return _journals[path]
+
+
 async def save_data(data: dict) -> None:
-    import json
-    import os
-    
-    output_dir = "output/sessions/"
-    os.makedirs(output_dir, exist_ok=True)
-
-    filename: str = "session.json"
-
-    if "session" in data and "time" in data["session"] and "id" in data["session"]:
-        filename = data["session"]["time"] + "_" + data["session"]["id"] + ".json"
-    else:
-        import time
-        filename = str(int(time.time())) + "_session" + ".json"
-    
-    filepath: str = output_dir + filename
-
-    with open(filepath, "w+") as f:
-        json.dump(data, f, indent=4)
-
-    print(f"Data saved to {filepath}")
\ No newline at end of file
+    """
+    Journals what changed in data since the last save. The write happens in
+    the background within a second; use flush_data to wait for it.
+    """
+    await get_journal(get_session_path(data)).commit(data)
+
+
+async def flush_data(data: dict) -> None:
+    path: str = get_session_path(data)
+    await get_journal(path).flush()
+    print(f"Data saved to {path}")
+
+
+async def close_data(data: dict) -> None:
+    """
+    Flushes a finished session and forgets its journal state, so a process
+    running many sessions does not keep them all.
+    """
+    await flush_data(data)
+    _journals.pop(os.path.abspath(get_session_path(data)), None)
+
+
+def load_data(session: str) -> dict:
+    """
+    Rebuilds a session from its journal. session is a journal path or the
+    "<time>_<id>" name of a session in output_dir.
+    """
+    path: str = session if os.path.exists(session) else os.path.join(output_dir, session + ".jsonl.gz")
+    return blob_store.restore(get_journal(path).load())
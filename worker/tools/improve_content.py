@@ -1,5 +1,7 @@
 import json
-from worker.agent import run_agent
+import asyncio
+from worker.agent import run_agent, run_agent_n
+from worker.test import score_content
 
 async def main(data: dict = {}, new_data: str = "", task: str = "") -> str:
     """
@@ -37,12 +39,61 @@ The content should improve towards being {data["claim"]}
 How can the  INITIAL CONTENT be improved to better match the CLAIM by incorporating information from the NEW DATA according to the TASK?
 """
 
+    return await request_improvement(data, user_prompt)
+
+
+async def merged(data: dict = {}, items: list[tuple[str, str]] = []) -> str:
+    """
+    Improves the content for several tasks in one generation.
+
+    items: (task, new data) pairs, applied in the given order.
+    """
+
+    if "claim" not in data or "content" not in data or "iterations" not in data or not items:
+        print("❌ ERROR: Missing required keys in data dictionary or no tasks to merge.")
+        return ""
+
+    print(f"\n📝 Improving content for {len(items)} tasks at once")
+    for task, new_data in items:
+        print(f"  ├─ Task: {task} ({len(new_data)} characters of new data)")
+
+    sections: str = "\n\n".join(
+        f"""TASK {index}:
+{task}
+
+NEW DATA {index}:
+{new_data}""" for index, (task, new_data) in enumerate(items, start=1)
+    )
+
+    user_prompt: str = f"""
+INITIAL CONTENT:
+{data["content"][-1]}
+
+{sections}
+
+CLAIM:
+The content should improve towards being {data["claim"]}
+
+How can the INITIAL CONTENT be improved to better match the CLAIM by incorporating information from each NEW DATA according to its TASK? Apply all {len(items)} tasks in one improved version.
+"""
+
+    return await request_improvement(data, user_prompt)
+
+
+async def request_improvement(data: dict, user_prompt: str) -> str:
+    # With beam_width above 1 several candidates compete and the best scored is kept
+    if data.get("beam_width", 1) > 1:
+        improved_content: str = await request_beam(data, user_prompt, data["beam_width"])
+        if improved_content:
+            return improved_content
+
     improved_content: str = ""
     i: int = 0
     while i < data["iterations"]:
         try:
             print(f"  ├─ Attempt {i + 1}/{data['iterations']} to improve content...")
-            improved_content: str = await run_agent("improve_content", user_prompt)
+            # A generation, not a lookup: a repeated improvement must get a fresh rewrite
+            improved_content: str = await run_agent("improve_content", user_prompt, use_cache=False)
             print(f"  ├─ Content improvement successful on attempt {i + 1}")
             break
         except Exception as e:
@@ -55,6 +106,31 @@ How can the  INITIAL CONTENT be improved to better match the CLAIM by incorporat
     return improved_content
 
 
+async def request_beam(data: dict, user_prompt: str, width: int) -> str:
+    """
+    Samples width candidate improvements in one request, scores them all at
+    the same time with the test prompt and returns the best one. Returns an
+    empty string when no candidate was generated.
+    """
+    print(f"  ├─ Generating {width} candidate improvements...")
+    candidates: list[str] = [candidate for candidate in await run_agent_n("improve_content", user_prompt, width) if candidate]
+    if not candidates:
+        print(f"  ├─ ⚠️ No candidates generated, improving without the beam")
+        return ""
+
+    print(f"  ├─ Scoring {len(candidates)} candidates...")
+    scores: list[float | None] = await asyncio.gather(*[
+        score_content(data, candidate, data.get("beam_samples", 2)) for candidate in candidates
+    ])
+    for index, score in enumerate(scores):
+        print(f"  ├─ Candidate {index + 1}: {len(candidates[index])} characters, score {score if score is None else f'{score:.2f}'}")
+
+    best: int = max(range(len(candidates)), key=lambda index: scores[index] if scores[index] is not None else float("-inf"))
+    print(f"  └─ Keeping candidate {best + 1}")
+
+    return candidates[best]
+
+
 if __name__ == "__main__":
     import asyncio
     import json
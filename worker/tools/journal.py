@@ -0,0 +1,126 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+
+from tools.utils.blob_store import BlobList
+
+flush_interval: float = 1.0 # Seconds buffered changes wait before being written and fsynced
+
+
+def encode(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+class Journal:
+    """
+    Append-only record of how a session dict changes.
+
+    commit compares the dict with what was journaled before and buffers only
+    the differences: new or replaced keys, items appended to a list, or
+    single list items that changed. BlobLists are recorded as their blob
+    references, so content versions are written once. Buffered records are written at most
+    once per flush_interval as one gzip member with an fsync, in a thread so
+    the event loop keeps running. replay rebuilds the dict from the file,
+    ignoring a last member that was cut short by a crash.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.encoded: dict[str, str | list[str]] = {}
+        self.buffer: list[str] = []
+        self.flush_handle: asyncio.TimerHandle | None = None
+        self.lock = asyncio.Lock()
+
+    def load(self) -> dict:
+        data: dict = replay(self.path)
+        self.encoded = {key: snapshot(value) for key, value in data.items()}
+        return data
+
+    async def commit(self, data: dict) -> None:
+        records: list[dict] = []
+        for key, value in data.items():
+            records += self.diff(key, value)
+        for key in [key for key in self.encoded if key not in data]:
+            del self.encoded[key]
+            records.append({"op": "delete", "key": key})
+
+        # Encoded now, the dict keeps changing while the write waits
+        now: float = time.time()
+        self.buffer += [json.dumps({"time": now, **record}, ensure_ascii=False) + "\n" for record in records]
+
+        if self.buffer and self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_later(flush_interval, lambda: asyncio.ensure_future(self.flush()))
+
+    def diff(self, key: str, value) -> list[dict]:
+        # A BlobList is journaled as its references, the text is in the blob store
+        if isinstance(value, BlobList):
+            value = value.refs
+        old = self.encoded.get(key)
+        new = snapshot(value)
+        if old == new:
+            return []
+        self.encoded[key] = new
+
+        if isinstance(old, list) and isinstance(new, list) and len(new) >= len(old):
+            records: list[dict] = [
+                {"op": "item", "key": key, "index": index, "value": value[index]}
+                for index in range(len(old)) if old[index] != new[index]
+            ]
+            if len(new) > len(old):
+                records.append({"op": "extend", "key": key, "value": value[len(old):]})
+            return records
+        return [{"op": "set", "key": key, "value": value}]
+
+    async def flush(self) -> None:
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        async with self.lock:
+            records, self.buffer = self.buffer, []
+            if records:
+                await asyncio.to_thread(self.write, records)
+
+    def write(self, records: list[str]) -> None:
+        lines: str = "".join(records)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as file:
+            file.write(gzip.compress(lines.encode("utf-8")))
+            file.flush()
+            os.fsync(file.fileno())
+
+
+def snapshot(value) -> str | list[str]:
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    return encode(value)
+
+
+def replay(path: str) -> dict:
+    data: dict = {}
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                apply(data, json.loads(line))
+    except FileNotFoundError:
+        raise
+    except (OSError, EOFError, ValueError) as e:
+        # The last write was interrupted, everything before it is intact
+        print(f"⚠️ Journal {path} ends in an incomplete record, resuming from the last complete one: {e}")
+    return data
+
+
+def apply(data: dict, record: dict) -> None:
+    op: str = record["op"]
+    key: str = record["key"]
+    if op == "set":
+        data[key] = record["value"]
+    elif op == "delete":
+        data.pop(key, None)
+    elif op == "extend":
+        data.setdefault(key, []).extend(record["value"])
+    elif op == "item":
+        data[key][record["index"]] = record["value"]
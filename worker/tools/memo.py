@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import gzip
+import hashlib
+import threading
+
+from worker.agent import registry
+
+project_root: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+enabled: bool = True # Global switch, per-stage policies are set with data["memo"]
+memo_dir: str = os.path.join(project_root, "output", "cache", "memo")
+default_policy: str = "reuse" # reuse: return a stored result, refresh: recompute and store, off: neither
+
+stats: dict = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0
+}
+
+
+def normalize(text: str) -> str:
+    """
+    Whitespace differences do not change what a stage is asked.
+    """
+    return " ".join(str(text).split())
+
+
+def make_key(stage: str, prompt_names: list[str], inputs: dict) -> str:
+    """
+    Hashes the stage, the versions of the prompts it runs and its normalised
+    inputs. Unlike the LLM cache key this does not include the rendered
+    prompt, so a result is still found after a prompt is only reformatted.
+    """
+    key_data: dict = {
+        "stage": stage,
+        "prompts": {name: registry.get(name).version for name in prompt_names},
+        "inputs": {name: normalize(value) if isinstance(value, str) else value for name, value in inputs.items()}
+    }
+    key_text: str = json.dumps(key_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+
+
+def get_policy(data: dict, stage: str) -> str:
+    return data.get("memo", {}).get(stage, default_policy) if enabled else "off"
+
+
+def get_path(key: str) -> str:
+    return os.path.join(memo_dir, key[:2], key + ".json.gz")
+
+
+def get(data: dict, stage: str, key: str):
+    """
+    The stored result of the stage for key, or None when there is none or
+    the stage's policy does not reuse results.
+    """
+    if get_policy(data, stage) != "reuse":
+        return None
+
+    try:
+        with gzip.open(get_path(key), "rt", encoding="utf-8") as file:
+            entry: dict = json.load(file)
+    except (OSError, ValueError):
+        stats["misses"] += 1
+        return None
+
+    stats["hits"] += 1
+    print(f"  ├─ ♻️ Reusing {stage} result from {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['time']))}")
+    return entry["result"]
+
+
+def put(data: dict, stage: str, key: str, result) -> None:
+    if get_policy(data, stage) == "off":
+        return
+
+    path: str = get_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    temp_path: str = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as file:
+        json.dump({"time": time.time(), "stage": stage, "result": result}, file)
+    os.replace(temp_path, path)
+
+    stats["stores"] += 1
@@ -2,14 +2,63 @@ import asyncio
 
 from worker.tools.create_query import main as create_query
 from worker.tools.improve_content import main as improve_content
+from worker.tools.improve_content import merged as improve_content_merged
+from worker.tools.file_handler import save_data
+from llm.tokenizer import count_tokens
 from tools.web.web_research import get_web_research
+from tools.utils import blob_store
+
+
+async def research(data: dict, task: str, semaphore: asyncio.Semaphore) -> dict:
+    async with semaphore:
+        web_research_query = await create_query(data, task)
+        print(f"  ├─ Created query: {web_research_query[:50]}..." if len(web_research_query) > 50 else f"  ├─ Created query: {web_research_query}")
+
+        return await get_web_research(web_research_query, 3)
 
 
 async def main(data: dict = {}) -> None:
     print(f"\n==== STARTING WORK MODULE ====")
     print(f"Processing {len(data['tasks'])} tasks")
-    
+
+    # Queries and research do not depend on earlier improvements, so they are
+    # started for every task up front against the current content. Only
+    # improve_content runs in task order on the latest version.
+    snapshot: dict = dict(data)
+    snapshot["content"] = data["content"][:]
+    semaphore = asyncio.Semaphore(data.get("research_concurrency", 3))
+    prefetch: dict[int, asyncio.Task] = {
+        i: asyncio.ensure_future(research(snapshot, task["task"], semaphore))
+        for i, task in enumerate(data["tasks"])
+        if "Let AI do a web search" in task["tools"] and not task.get("done")
+    }
+    print(f"🔍 Prefetching web research for {len(prefetch)} tasks")
+
+    try:
+        await process_tasks(data, prefetch, semaphore)
+    finally:
+        # Research for tasks that were never reached, e.g. after an error, is
+        # stopped and awaited so nothing keeps running or fails unnoticed
+        for pending in prefetch.values():
+            pending.cancel()
+        await asyncio.gather(*prefetch.values(), return_exceptions=True)
+
+    print(f"\n==== WORK MODULE COMPLETED ====")
+
+
+async def process_tasks(data: dict, prefetch: dict[int, asyncio.Task], semaphore: asyncio.Semaphore) -> None:
+    # With merge_improvements consecutive tasks are improved in one generation
+    # while their new data fits in merge_tokens
+    merge: bool = data.get("merge_improvements", False)
+    merge_tokens: int = data.get("merge_tokens", 6000)
+    group: list[tuple[dict, str]] = []
+    group_tokens: int = 0
+
     for i, task in enumerate(data["tasks"]):
+        if task.get("done"):
+            print(f"\n[Task {i+1}/{len(data['tasks'])}] Already done: {task['task']}")
+            continue
+
         print(f"\n[Task {i+1}/{len(data['tasks'])}] Processing: {task['task']}")
 
         task["data"] = []
@@ -18,13 +67,24 @@ async def main(data: dict = {}) -> None:
             if tool == "Let AI do a web search":
                 print(f"🔍 Performing web search for task: {task['task']}")
 
-                web_research_query = await create_query(data, task["task"])
-                print(f"  ├─ Created query: {web_research_query[:50]}..." if len(web_research_query) > 50 else f"  ├─ Created query: {web_research_query}")
-                
-                websearch_result = await get_web_research(web_research_query, 3)
+                if i in prefetch:
+                    websearch_result = await prefetch.pop(i)
+                else:
+                    websearch_result = await research(data, task["task"], semaphore)
                 print(f"  ├─ Web search completed: {len(websearch_result['summary'])} characters in summary")
                 
-                task["data"].append(websearch_result)
+                # The session keeps a reference, the summary itself goes to the blob store
+                task["data"].append({**websearch_result, "summary": blob_store.put(websearch_result["summary"])})
+
+                if merge:
+                    tokens: int = count_tokens(task["task"]) + count_tokens(websearch_result["summary"])
+                    if group and group_tokens + tokens > merge_tokens:
+                        await apply_group(data, group)
+                        group, group_tokens = [], 0
+                    group.append((task, websearch_result["summary"]))
+                    group_tokens += tokens
+                    print(f"  └─ Queued for merged improvement ({len(group)} tasks, {group_tokens} tokens of new data)")
+                    continue
 
                 print(f"  ├─ Improving content based on search results...")
                 improved_content = await improve_content(data, websearch_result["summary"], task["task"])
@@ -55,8 +115,28 @@ async def main(data: dict = {}) -> None:
                 # wait a second
         
         print(f"✅ Task {i+1} completed: {task['task']}")
-    
-    print(f"\n==== WORK MODULE COMPLETED ====")
+
+        # A queued task is done once its merged improvement is in the content
+        if not any(queued is task for queued, _ in group):
+            task["done"] = True
+            await save_data(data)
+
+    if group:
+        await apply_group(data, group)
+
+
+async def apply_group(data: dict, group: list[tuple[dict, str]]) -> None:
+    print(f"\n🔀 Improving content for {len(group)} queued tasks...")
+    if len(group) == 1:
+        improved_content = await improve_content(data, group[0][1], group[0][0]["task"])
+    else:
+        improved_content = await improve_content_merged(data, [(task["task"], summary) for task, summary in group])
+    print(f"  └─ Content improved: {len(improved_content)} characters")
+
+    data["content"].append(improved_content)
+    for task, _ in group:
+        task["done"] = True
+    await save_data(data)
 
 
 if __name__ == "__main__":